@@ -1,53 +1,131 @@
 # -*- coding: utf-8 -*-
 import argparse
+import os
+import subprocess
 import sys
 
-from workflow import Workflow, ICON_WARNING, PasswordNotFound
+from workflow import Workflow, ICON_WARNING
+
+from jenky import CACHE_SERIALIZER
+from jenky.cache import CacheManager
+from jenky.credentials import get_credentials
+from jenky.metrics import get_metrics
+from jenky.nodes import set_node_offline
+from jenky.server import get_jenkins
+from jenky.usage import UsageLog
 
 log = None
 
+def parse_query(wf, query):
+    # Alfred 3+ passes the actioned item's variables in the environment.
+    # Alfred 2 only has the arg, so fall back to its prefixes, e.g.
+    # "jenky_setting:hostname:https://..." or "jenky_action:clear_cache".
+    for kind in ("jenky_setting", "jenky_action"):
+        name = os.getenv(kind)
+        if name:
+            return kind, wf.decode(name), wf.decode(os.getenv("jenky_value", ""))
+    for kind in ("jenky_setting", "jenky_action"):
+        if query.startswith(kind + ":"):
+            name, _, value = query[len(kind) + 1:].partition(":")
+            return kind, name, value
+    return None, None, query
+
+
+def job_name(wf, url):
+    # Alfred 2 only passes the arg, the job's URL
+    for job in wf.cached_data("jobs", max_age=0) or []:
+        if job.get("url") == url:
+            return job.get("name")
+    return None
+
+
 def main(wf):
     parser = argparse.ArgumentParser()
     parser.add_argument("query", nargs="?", default="")
     args = parser.parse_args(wf.args)
 
-    query = args.query
+    kind, name, value = parse_query(wf, args.query)
+    log.debug("%s %s" % (kind, name))
 
     # Settings
-    log.debug(query)
-    if query.startswith("jenky_setting:"):
-        query = query.replace("jenky_setting:", "")
-        if query.startswith("username:"):
-            log.debug("Saving username: %s" % query)
-            query = query.replace("username:", "")
-            wf.settings["jenkins_username"] = query
-            print "Username set as \"%s\"." % query
-            return 0
-        elif query.startswith("api_key:"):
+    if kind == "jenky_setting":
+        if name == "username":
+            log.debug("Saving username: %s" % value)
+            wf.settings["jenkins_username"] = value
+            print "Username set as \"%s\"." % value
+            return 0
+        elif name == "api_key":
             log.debug("Saving API Key...")
-            query = query.replace("api_key:", "")
-            wf.save_password("jenkins_api_key", query)
+            get_credentials(wf).set("jenkins_api_key", value)
             print "API Key has been set."
             return 0
-        elif query.startswith("hostname:"):
-            log.debug("Saving hostname: %s" % query)
-            query = query.replace("hostname:", "")
-            wf.settings["jenkins_hostname"] = query
-            print "Hostname set as \"%s\"." % query
+        elif name == "hostname":
+            log.debug("Saving hostname: %s" % value)
+            wf.settings["jenkins_hostname"] = value
+            print "Hostname set as \"%s\"." % value
             return 0
     # Jenky Actions
-    elif query.startswith("jenky_action:"):
-        query = query.replace("jenky_action:", "")
+    elif kind == "jenky_action":
         # Clear out the Job cache
-        if query.startswith("clear_job_cache"):
+        if name == "clear_job_cache":
             log.debug("Clearing out Job cache...")
-            wf.clear_cache(lambda f: f.startswith("jobs"))
+            CacheManager(wf).clear("jobs")
             print "The job cache has been cleared."
             return 0
+        # Clear one cache entry, or all of them
+        elif name == "clear_cache" and value:
+            log.debug("Clearing out %s cache..." % value)
+            cache = CacheManager(wf)
+            if value not in [e["name"] for e in cache.entries()]:
+                print "Nothing is cached as %s." % value
+            elif cache.clear(value):
+                print "The %s cache has been cleared." % value
+            else:
+                print "The %s cache is being refreshed, try again in a moment." % value
+            return 0
+        elif name == "clear_cache":
+            log.debug("Clearing out all cached data...")
+            CacheManager(wf).clear()
+            print "All cached data has been cleared."
+            return 0
+        elif name == "trim_cache":
+            log.debug("Trimming cache...")
+            evicted = CacheManager(wf).enforce()
+            print "Evicted %d cache entries." % len(evicted)
+            return 0
+        elif name == "reset_metrics":
+            log.debug("Resetting request metrics...")
+            get_metrics(wf).reset()
+            print "Request metrics have been reset."
+            return 0
+        # Open a job, remembering it so it ranks higher next time
+        elif name == "open_job":
+            job = wf.decode(os.getenv("jenky_job", "")) or job_name(wf, value)
+            log.debug("Opening job %s..." % job)
+            if job:
+                UsageLog(wf).record(job)
+            subprocess.call(["open", value])
+            return 0
+        # Toggle a node offline/online
+        elif name == "disable_node":
+            log.debug("Taking node %s offline..." % value)
+            get_jenkins(wf).disable_node(value, "Taken offline from Jenky")
+            nodes = wf.cached_data("nodes", max_age=0) or []
+            wf.cache_data("nodes", set_node_offline(nodes, value, True))
+            print "Node \"%s\" is now offline." % value
+            return 0
+        elif name == "enable_node":
+            log.debug("Bringing node %s online..." % value)
+            get_jenkins(wf).enable_node(value)
+            nodes = wf.cached_data("nodes", max_age=0) or []
+            wf.cache_data("nodes", set_node_offline(nodes, value, False))
+            print "Node \"%s\" is back online." % value
+            return 0
     return 0
 
 
 if __name__ == '__main__':
     wf = Workflow()
+    wf.cache_serializer = CACHE_SERIALIZER
     log = wf.logger
     sys.exit(wf.run(main))
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Compare ``Workflow.send_feedback`` against the ElementTree path it
+replaced, and check that both produce the same bytes.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_feedback [COUNT ...]
+
+"""
+import sys
+import timeit
+from cStringIO import StringIO
+
+from workflow.workflow import ET, Item, Workflow
+
+from benchmarks.jobs import generate_jobs
+
+
+def job_items(jobs):
+    return [{
+        "title": job["name"],
+        "subtitle": job["url"],
+        "valid": True,
+        "arg": job["url"],
+        "uid": job["name"]
+    } for job in jobs]
+
+
+def elementtree_feedback(items):
+    # send_feedback() before the streaming writer
+    root = ET.Element("items")
+    for item in items:
+        root.append(item.elem)
+    return ('<?xml version="1.0" encoding="utf-8"?>\n' +
+            ET.tostring(root).encode("utf-8"))
+
+
+def streaming_feedback(wf):
+    stdout, sys.stdout = sys.stdout, StringIO()
+    try:
+        wf.send_feedback()
+        return sys.stdout.getvalue()
+    finally:
+        sys.stdout = stdout
+
+
+def main(counts):
+    print("%8s %14s %14s %8s" % ("items", "etree ms", "streaming ms", "speedup"))
+    for count in counts:
+        kwargs = job_items(generate_jobs(count))
+        wf = Workflow()
+
+        def build():
+            wf._items = []
+            wf.add_items(kwargs)
+
+        def build_one_by_one():
+            return [Item(**item) for item in kwargs]
+
+        build()
+        assert streaming_feedback(wf) == elementtree_feedback(wf._items)
+
+        repeat, number = 5, max(1, 2000 // count)
+        etree = min(timeit.repeat(lambda: elementtree_feedback(build_one_by_one()),
+                                  number=number, repeat=repeat)) / number
+        streaming = min(timeit.repeat(lambda: (build(), streaming_feedback(wf)),
+                                      number=number, repeat=repeat)) / number
+        print("%8d %14.2f %14.2f %7.1fx" % (
+            count, etree * 1000, streaming * 1000, etree / streaming))
+
+
+if __name__ == "__main__":
+    main([int(c) for c in sys.argv[1:]] or [50, 500, 5000])
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Compare the registered cache serializers on a job-list shaped payload.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_serializers [COUNT ...]
+
+Load time matters most: the job cache is loaded on every keystroke.
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+from workflow.workflow import manager
+
+from benchmarks.jobs import generate_jobs
+
+
+def bench(serializer, data, path, repeat=5):
+    def dump():
+        with open(path, "wb") as file_obj:
+            serializer.dump(data, file_obj)
+
+    def load():
+        with open(path, "rb") as file_obj:
+            return serializer.load(file_obj)
+
+    dump_time = min(timeit.repeat(dump, number=1, repeat=repeat))
+    load_time = min(timeit.repeat(load, number=1, repeat=repeat))
+    assert load() == data
+    return dump_time, load_time, os.path.getsize(path)
+
+
+def main(counts):
+    tmpdir = tempfile.mkdtemp()
+    results = []
+    for count in counts:
+        jobs = generate_jobs(count)
+        print("%d jobs" % count)
+        print("  %-10s %10s %10s %10s" % ("serializer", "dump ms", "load ms", "KiB"))
+        for name in manager.serializers:
+            path = os.path.join(tmpdir, "jobs.%s" % name)
+            dump_time, load_time, size = bench(manager.serializer(name), jobs, path)
+            results.append((count, name, load_time))
+            print("  %-10s %10.2f %10.2f %10.1f" % (
+                name, dump_time * 1000, load_time * 1000, size / 1024.0))
+        fastest = min([r for r in results if r[0] == count], key=lambda r: r[2])
+        print("  fastest load: %s" % fastest[1])
+    for name in os.listdir(tmpdir):
+        os.unlink(os.path.join(tmpdir, name))
+    os.rmdir(tmpdir)
+
+
+if __name__ == "__main__":
+    main([int(c) for c in sys.argv[1:]] or [1000, 10000, 100000])
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Synthetic Jenkins job lists shaped like ``Jenkins.get_jobs()`` output."""
+import random
+
+TEAMS = ["payments", "search", "checkout", "identity", "platform", "mobile",
+         "data", "infra", "billing", "growth", "ads", "notifications"]
+SERVICES = ["api", "web", "worker", "gateway", "scheduler", "indexer", "ui",
+            "auth", "ledger", "reports", "etl", "proxy", "cache", "sync"]
+KINDS = ["build", "deploy", "test", "release", "nightly", "integration",
+         "smoke", "lint", "docs", "migrate", "benchmark", "promote"]
+ENVS = ["dev", "staging", "prod", "eu", "us", "qa", "canary"]
+COLORS = ["blue"] * 12 + ["red"] * 3 + ["yellow", "disabled", "notbuilt",
+                                        "aborted", "blue_anime", "red_anime"]
+
+
+def job_name(rnd):
+    parts = [rnd.choice(TEAMS), rnd.choice(SERVICES), rnd.choice(KINDS)]
+    if rnd.random() < 0.6:
+        parts.append(rnd.choice(ENVS))
+    name = "-".join(parts)
+    roll = rnd.random()
+    if roll < 0.15:
+        name = "".join(p.capitalize() for p in name.split("-"))
+    elif roll < 0.25:
+        name = name.replace("-", "_")
+    elif roll < 0.30:
+        name = u"%s-%s" % (name, rnd.choice([u"zürich", u"münchen", u"são-paulo"]))
+    return name
+
+
+def generate_jobs(count, server="http://jenkins.example.com/", seed=1):
+    rnd = random.Random(seed)
+    seen = set()
+    jobs = []
+    while len(jobs) < count:
+        name = job_name(rnd)
+        if name in seen:
+            name = u"%s-%d" % (name, len(jobs))
+        seen.add(name)
+        jobs.append({
+            u"name": unicode(name),
+            u"url": u"%sjob/%s/" % (server, name),
+            u"color": unicode(rnd.choice(COLORS))
+        })
+    return jobs
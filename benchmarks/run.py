@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""Reproducible benchmark suite, results as JSON for tracking regressions.
+
+Run from the repository root::
+
+    python -m benchmarks.run [--sizes 1000,10000,100000] [--output FILE]
+
+Measures, for each job list size:
+
+- ``filter``: ``Workflow.filter`` restricted to each ``MATCH_*`` rule
+- ``cache_load``: ``Workflow.cached_data`` load for each serializer, with
+  and without compression
+- ``feedback``: ``Workflow.send_feedback`` in XML and JSON format
+- ``main``: a ``main.py`` process against a local stub Jenkins, with the
+  job list fetched (``cold``) and cached (``warm``)
+
+Times are the best of ``--repeat`` runs, in milliseconds.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+import zipfile
+from cStringIO import StringIO
+
+from workflow import workflow
+from workflow.workflow import Workflow, manager
+
+from benchmarks.jobs import generate_jobs
+from benchmarks.stub_jenkins import StubJenkins
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUNDLE = os.path.join(ROOT, "Jenky.alfredworkflow")
+
+RULES = ["MATCH_STARTSWITH", "MATCH_CAPITALS", "MATCH_ATOM",
+         "MATCH_INITIALS_STARTSWITH", "MATCH_INITIALS_CONTAIN",
+         "MATCH_SUBSTRING", "MATCH_ALLCHARS", "MATCH_ALL"]
+# A prefix, initials and a word: between them every rule gets hits
+QUERIES = ["pay", "pwd", "api"]
+E2E_QUERY = "payments api"
+
+
+def best(func, repeat, number=1):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1000
+
+
+def alfred_env(tmpdir):
+    """Environment Alfred would run the workflow in, rooted in ``tmpdir``."""
+    return {
+        "alfred_workflow_bundleid": "com.dtillery.jenky",
+        "alfred_workflow_name": "Jenky",
+        "alfred_workflow_cache": os.path.join(tmpdir, "cache"),
+        "alfred_workflow_data": os.path.join(tmpdir, "data")
+    }
+
+
+def workflow_dir(tmpdir):
+    # info.plist only ships inside the bundle, Workflow() needs it on disk
+    path = os.path.join(tmpdir, "workflow")
+    os.mkdir(path)
+    with zipfile.ZipFile(BUNDLE) as bundle:
+        with open(os.path.join(path, "info.plist"), "wb") as file_obj:
+            file_obj.write(bundle.read("info.plist"))
+    return path
+
+
+def quiet_workflow():
+    wf = Workflow()
+    wf.logger.setLevel(logging.WARNING)
+    return wf
+
+
+def capture_feedback(wf):
+    stdout, sys.stdout = sys.stdout, StringIO()
+    try:
+        wf.send_feedback()
+        return len(sys.stdout.getvalue())
+    finally:
+        sys.stdout = stdout
+
+
+def bench_filter(wf, jobs, repeat):
+    key = lambda job: job["name"]
+    for rule in RULES:
+        for query in QUERIES:
+            match_on = getattr(workflow, rule)
+            run = lambda: wf.filter(query, jobs, key=key, min_score=20,
+                                    match_on=match_on)
+            yield {
+                "rule": rule,
+                "query": query,
+                "matches": len(run()),
+                "ms": best(run, repeat)
+            }
+
+
+def bench_cache_load(wf, jobs, repeat):
+    for name in manager.serializers:
+        for compress in (False, True):
+            wf.cache_serializer = name
+            wf.cache_compression["bench_jobs"] = compress
+            wf.cache_data("bench_jobs", jobs)
+
+            def load():
+                wf._cache_memo.clear()
+                return wf.cached_data("bench_jobs", max_age=0)
+
+            assert load() == jobs
+            yield {
+                "serializer": name,
+                "compressed": compress,
+                "bytes": os.path.getsize(wf.cachefile("bench_jobs.%s" % name)),
+                "ms": best(load, repeat)
+            }
+            wf.clear_cache(lambda filename: filename.startswith("bench_jobs"))
+
+
+def bench_feedback(wf, jobs, repeat):
+    items = [{
+        "title": job["name"],
+        "subtitle": job["url"],
+        "valid": True,
+        "arg": job["url"],
+        "uid": job["name"]
+    } for job in jobs]
+    for feedback_format in ("xml", "json"):
+        wf.feedback_format = feedback_format
+
+        def render():
+            wf._items = []
+            wf.add_items(items)
+            return capture_feedback(wf)
+
+        yield {
+            "format": feedback_format,
+            "bytes": render(),
+            "ms": best(render, repeat)
+        }
+
+
+def bench_main(tmpdir, count, repeat):
+    server = StubJenkins(count).start()
+    env = dict(os.environ, **alfred_env(os.path.join(tmpdir, "e2e")))
+    env["JENKY_JENKINS_API_KEY"] = "benchmark"
+    os.makedirs(env["alfred_workflow_data"])
+    with open(os.path.join(env["alfred_workflow_data"], "settings.json"), "wb") as file_obj:
+        json.dump({
+            "jenkins_hostname": server.url,
+            "jenkins_username": "benchmark",
+            "credential_backend": "env"
+        }, file_obj)
+    command = [sys.executable, os.path.join(ROOT, "main.py"), E2E_QUERY]
+
+    def run_main():
+        output = subprocess.check_output(command, cwd=os.path.join(tmpdir, "workflow"),
+                                         env=env, stderr=open(os.devnull, "wb"))
+        assert "Fetching jobs" not in output, "main.py did not fetch the job list"
+
+    def cold():
+        shutil.rmtree(env["alfred_workflow_cache"], ignore_errors=True)
+        run_main()
+
+    try:
+        yield {"cache": "cold", "ms": best(cold, repeat)}
+        yield {"cache": "warm", "ms": best(run_main, repeat)}
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(os.path.join(tmpdir, "e2e"), ignore_errors=True)
+
+
+def run(sizes, repeat, benchmarks, log):
+    tmpdir = tempfile.mkdtemp(prefix="jenky-bench-")
+    cwd = os.getcwd()
+    os.environ.update(alfred_env(tmpdir))
+    os.chdir(workflow_dir(tmpdir))
+    results = []
+    try:
+        for count in sizes:
+            jobs = generate_jobs(count)
+            for name in benchmarks:
+                log("%s: %d jobs" % (name, count))
+                if name == "main":
+                    rows = bench_main(tmpdir, count, repeat)
+                else:
+                    rows = globals()["bench_%s" % name](quiet_workflow(), jobs, repeat)
+                for row in rows:
+                    row.update(benchmark=name, jobs=count)
+                    results.append(row)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return {
+        "created": datetime.datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results
+    }
+
+
+def main():
+    benchmarks = ["filter", "cache_load", "feedback", "main"]
+    parser = argparse.ArgumentParser(description="Run the Jenky benchmarks.")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma-separated job list sizes")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per measurement, the best one counts")
+    parser.add_argument("--only", action="append", choices=benchmarks,
+                        help="run only this benchmark, may be repeated")
+    parser.add_argument("--output", help="write results here instead of stdout")
+    args = parser.parse_args()
+
+    log = lambda message: sys.stderr.write(message + "\n")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    report = run(sizes, args.repeat, args.only or benchmarks, log)
+    if args.output:
+        with open(args.output, "wb") as file_obj:
+            json.dump(report, file_obj, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
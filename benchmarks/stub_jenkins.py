@@ -0,0 +1,474 @@
+# -*- coding: utf-8 -*-
+"""Local Jenkins simulator for load, latency and caching tests.
+
+Serves the parts of the Jenkins API the ``jenkins`` client uses, from
+fixture data or a generated job list::
+
+    python -m benchmarks.stub_jenkins [--port 8080] [--jobs 10000]
+        [--fixture FILE] [--latency 0.05] [--jitter 0.02]
+        [--error-rate 0.1] [--padding 65536] [--console-size 100000]
+        [--crumb]
+
+Endpoints: ``api/json``, ``job/NAME/api/json``, ``job/NAME/config.xml``,
+``job/NAME/N/api/json``, ``job/NAME/N/consoleText``,
+``job/NAME/N/logText/progressiveText``, ``queue/api/json``,
+``computer/api/json``, ``computer/NAME/api/json``,
+``computer/NAME/toggleOffline``, ``pluginManager/api/json`` and
+``crumbIssuer/api/json``. JSON endpoints honour ``tree=``, including
+``{from,to}`` ranges.
+
+A fixture is a JSON object with any of the keys ``jobs``, ``computer``,
+``queue``, ``plugins``, ``configs`` (job name to config.xml) and
+``consoles`` (job name to console text). Missing keys are generated.
+"""
+import argparse
+import BaseHTTPServer
+import collections
+import json
+import random
+import re
+import SocketServer
+import threading
+import time
+import urllib
+import urlparse
+
+from benchmarks.jobs import generate_jobs
+
+BUILDS_PER_JOB = 3
+CONSOLE_LINE = "[%(job)s #%(number)d] step %(step)d: compiling module %(step)d of many\n"
+CRUMB = {"crumbRequestField": "Jenkins-Crumb", "crumb": "0123456789abcdef"}
+CONFIG_XML = """<?xml version='1.0' encoding='UTF-8'?>
+<project>
+  <description>%(name)s</description>
+  <assignedNode>%(label)s</assignedNode>
+  <builders>
+    <hudson.tasks.Shell>
+      <command>make -C %(name)s test</command>
+    </hudson.tasks.Shell>
+  </builders>
+</project>
+"""
+
+
+def parse_tree(tree):
+    """Parse Jenkins ``tree`` syntax into ``{field: (subtree, range)}``.
+
+    A leaf's subtree is ``None``, a range is ``(start, stop)`` or ``None``.
+    """
+    tokens = re.findall(r"\{\s*\d*\s*,?\s*\d*\s*\}|[\[\],]|[^\[\],{]+", tree)
+    fields, _ = _parse_fields(tokens, 0)
+    return fields
+
+
+def _parse_fields(tokens, pos):
+    fields = {}
+    while pos < len(tokens) and tokens[pos] != "]":
+        if tokens[pos] == ",":
+            pos += 1
+            continue
+        name, subtree, span = tokens[pos].strip(), None, None
+        pos += 1
+        if pos < len(tokens) and tokens[pos] == "[":
+            subtree, pos = _parse_fields(tokens, pos + 1)
+            pos += 1  # closing bracket
+        if pos < len(tokens) and tokens[pos].startswith("{"):
+            span = _parse_range(tokens[pos])
+            pos += 1
+        fields[name] = (subtree, span)
+    return fields, pos
+
+
+def _parse_range(token):
+    # {M,N} is [M, N), {M,} from M, {,N} up to N and {N} just N
+    bounds = token.strip("{} ").split(",")
+    start = int(bounds[0]) if bounds[0].strip() else 0
+    if len(bounds) == 1:
+        return start, start + 1
+    return start, int(bounds[1]) if bounds[1].strip() else None
+
+
+def apply_tree(data, fields):
+    if isinstance(data, list):
+        return [apply_tree(item, fields) for item in data]
+    if not isinstance(data, dict):
+        return data
+    result = {}
+    for name, (subtree, span) in fields.items():
+        if name not in data:
+            continue
+        value = data[name]
+        if span and isinstance(value, list):
+            value = value[span[0]:span[1]]
+        result[name] = apply_tree(value, subtree) if subtree else value
+    return result
+
+
+def console_text(job, number, size):
+    lines, length, step = [], 0, 0
+    while length < size:
+        line = CONSOLE_LINE % {"job": job, "number": number, "step": step}
+        lines.append(line)
+        length += len(line)
+        step += 1
+    return "".join(lines) + "Finished: SUCCESS\n"
+
+
+class StubJenkinsHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    routes = [
+        ("GET", r"/api/json", "info"),
+        ("GET", r"/job/([^/]+)/api/json", "job_info"),
+        ("GET", r"/job/([^/]+)/config\.xml", "job_config"),
+        ("GET", r"/job/([^/]+)/(\d+)/api/json", "build_info"),
+        ("GET", r"/job/([^/]+)/(\d+)/consoleText", "console"),
+        ("GET", r"/job/([^/]+)/(\d+)/logText/progressiveText", "progressive_console"),
+        ("GET", r"/queue/api/json", "queue"),
+        ("GET", r"/computer/api/json", "computer"),
+        ("GET", r"/computer/([^/]+)/api/json", "node_info"),
+        ("POST", r"/computer/([^/]+)/toggleOffline", "toggle_offline"),
+        ("GET", r"/pluginManager/api/json", "plugins"),
+        ("GET", r"/crumbIssuer/api/json", "crumb")
+    ]
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        self.dispatch("POST")
+
+    def dispatch(self, method):
+        url = urlparse.urlparse(self.path)
+        self.params = dict(urlparse.parse_qsl(url.query))
+        server = self.server
+        server.simulate_latency()
+        for route_method, pattern, name in self.routes:
+            match = re.match(pattern + "$", url.path)
+            if match and route_method == method:
+                server.count(name)
+                if (method == "POST" and server.crumb and
+                        self.headers.get(CRUMB["crumbRequestField"]) != CRUMB["crumb"]):
+                    return self.send_error(403, "No valid crumb was included in the request")
+                if server.should_fail():
+                    return self.send_error(500, "Simulated failure")
+                args = [urllib.unquote(arg).decode("utf-8") for arg in match.groups()]
+                return getattr(self, "handle_" + name)(*args)
+        server.count("not_found")
+        self.send_error(404)
+
+    def send_body(self, body, content_type, headers=None):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for header, value in (headers or {}).items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, data):
+        if "tree" in self.params:
+            data = apply_tree(data, parse_tree(self.params["tree"]))
+        body = json.dumps(data)
+        # Whitespace keeps the document valid while growing the payload
+        body += " " * max(self.server.padding - len(body), 0)
+        self.send_body(body, "application/json;charset=utf-8")
+
+    def send_error(self, code, message=None):
+        # The base class closes keep-alive connections on errors
+        body = message or self.responses[code][0]
+        self.send_response(code)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def job_or_404(self, name):
+        job = self.server.jobs_by_name.get(name)
+        if job is None:
+            self.send_error(404)
+        return job
+
+    def handle_info(self):
+        self.send_json({
+            "mode": "NORMAL",
+            "nodeDescription": "the master Jenkins node",
+            "jobs": self.server.jobs,
+            "views": [{"name": "all", "url": self.server.url}]
+        })
+
+    def handle_job_info(self, name):
+        job = self.job_or_404(name)
+        if job is not None:
+            self.send_json(self.server.job_info(job))
+
+    def handle_job_config(self, name):
+        job = self.job_or_404(name)
+        if job is not None:
+            self.send_body(self.server.config(job).encode("utf-8"), "application/xml")
+
+    def handle_build_info(self, name, number):
+        job = self.job_or_404(name)
+        if job is not None:
+            self.send_json(self.server.build_info(job, int(number)))
+
+    def handle_console(self, name, number):
+        job = self.job_or_404(name)
+        if job is not None:
+            self.send_body(self.server.console(job, int(number)), "text/plain;charset=utf-8")
+
+    def handle_progressive_console(self, name, number):
+        # Each poll reveals another chunk, as if the build were still writing
+        job = self.job_or_404(name)
+        if job is None:
+            return
+        text = self.server.console(job, int(number))
+        start = min(int(self.params.get("start") or 0), len(text))
+        end = min(start + self.server.progressive_chunk, len(text))
+        self.send_body(text[start:end], "text/plain;charset=utf-8", {
+            "X-Text-Size": str(end),
+            "X-More-Data": "true" if end < len(text) else "false"
+        })
+
+    def handle_queue(self):
+        self.send_json({"items": self.server.queue})
+
+    def handle_computer(self):
+        computers = self.server.computers
+        total = sum(c["numExecutors"] for c in computers)
+        busy = sum(1 for c in computers for e in c["executors"] if not e["idle"])
+        self.send_json({
+            "busyExecutors": busy,
+            "totalExecutors": total,
+            "computer": computers
+        })
+
+    def handle_node_info(self, name):
+        for computer in self.server.computers:
+            if computer["displayName"] == name:
+                return self.send_json(computer)
+        self.send_error(404)
+
+    def handle_toggle_offline(self, name):
+        for computer in self.server.computers:
+            if computer["displayName"] == name:
+                computer["temporarilyOffline"] = not computer["temporarilyOffline"]
+                computer["offline"] = computer["temporarilyOffline"]
+                return self.send_body("", "text/plain")
+        self.send_error(404)
+
+    def handle_plugins(self):
+        self.send_json({"plugins": self.server.plugins})
+
+    def handle_crumb(self):
+        if not self.server.crumb:
+            return self.send_error(404)
+        self.send_json(CRUMB)
+
+
+class StubJenkins(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """Threaded fake Jenkins master.
+
+    :param job_count: number of jobs to generate if the fixture has none
+    :param port: port to listen on, ``0`` picks a free one
+    :param fixture: ``dict`` of fixture data, see the module docstring
+    :param latency: seconds every request is delayed by
+    :param jitter: up to this many seconds are added to ``latency`` at
+        random
+    :param error_rate: fraction of matched requests answered with a 500
+    :param padding: JSON responses are padded to at least this many bytes
+    :param console_size: size in bytes of generated console logs
+    :param progressive_chunk: bytes returned per ``progressiveText`` poll
+    :param crumb: reject POSTs without the CSRF crumb ``crumbIssuer`` returns
+    :param seed: seed for generated data, latency jitter and errors
+    """
+
+    daemon_threads = True
+
+    def __init__(self, job_count=1000, port=0, fixture=None, latency=0,
+                 jitter=0, error_rate=0, padding=0, console_size=10000,
+                 progressive_chunk=4096, crumb=False, seed=1):
+        BaseHTTPServer.HTTPServer.__init__(self, ("127.0.0.1", port), StubJenkinsHandler)
+        fixture = fixture or {}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.padding = padding
+        self.console_size = console_size
+        self.progressive_chunk = progressive_chunk
+        self.crumb = crumb
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.hits = collections.Counter()
+        self.jobs = fixture.get("jobs") or generate_jobs(job_count, server=self.url, seed=seed)
+        self.jobs_by_name = dict((job["name"], job) for job in self.jobs)
+        self.configs = fixture.get("configs", {})
+        self.consoles = fixture.get("consoles", {})
+        self._consoles = {}
+        self.computers = fixture.get("computer") or self.generate_computers()
+        self.queue = fixture.get("queue") or self.generate_queue()
+        self.plugins = fixture.get("plugins") or self.generate_plugins()
+
+    @classmethod
+    def from_fixture(cls, path, **kwargs):
+        with open(path, "rb") as file_obj:
+            return cls(fixture=json.load(file_obj), **kwargs)
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%d/" % self.server_port
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def count(self, endpoint):
+        with self.lock:
+            self.hits[endpoint] += 1
+
+    def simulate_latency(self):
+        with self.lock:
+            delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+
+    def should_fail(self):
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def generate_computers(self):
+        computers = []
+        for i in range(4):
+            name = i and "agent-%d" % i or "master"
+            computers.append({
+                "displayName": name,
+                "offline": i == 3,
+                "temporarilyOffline": i == 3,
+                "numExecutors": 2,
+                "executors": [{"idle": bool(i % 2)}, {"idle": True}],
+                "assignedLabels": [{"name": name}, {"name": i and "linux" or "master"}]
+            })
+        return computers
+
+    def generate_queue(self):
+        return [{
+            "id": i + 1,
+            "why": "Waiting for next available executor",
+            "stuck": False,
+            "blocked": False,
+            "buildable": True,
+            "inQueueSince": int(time.time() * 1000) - i * 60000,
+            "task": {"name": job["name"], "url": job["url"], "color": job["color"]}
+        } for i, job in enumerate(self.jobs[:5])]
+
+    def generate_plugins(self):
+        names = ["git", "credentials", "workflow-aggregator", "gearman-plugin",
+                 "ssh-slaves", "matrix-auth", "timestamper", "ws-cleanup"]
+        return [{
+            "shortName": name,
+            "longName": name.replace("-", " ").title() + " Plugin",
+            "version": "1.%d" % i,
+            "active": True,
+            "enabled": True,
+            "hasUpdate": i % 3 == 0,
+            "url": "https://plugins.jenkins.io/%s" % name
+        } for i, name in enumerate(names)]
+
+    def build_info(self, job, number):
+        building = job["color"].endswith("_anime") and number == BUILDS_PER_JOB
+        result = None
+        if not building:
+            result = job["color"].startswith("red") and "FAILURE" or "SUCCESS"
+        return {
+            "number": number,
+            "url": "%s%d/" % (job["url"], number),
+            "fullDisplayName": "%s #%d" % (job["name"], number),
+            "building": building,
+            "result": result,
+            "duration": 0 if building else 60000 * number,
+            "timestamp": 1420070400000 + number * 3600000
+        }
+
+    def job_info(self, job):
+        builds = [self.build_info(job, n) for n in range(BUILDS_PER_JOB, 0, -1)]
+        info = dict(job)
+        info.update({
+            "displayName": job["name"],
+            "description": "",
+            "buildable": job["color"] != "disabled",
+            "concurrentBuild": False,
+            "keepDependencies": False,
+            "builds": builds,
+            "lastBuild": builds[0],
+            "lastCompletedBuild": [b for b in builds if not b["building"]][0],
+            "nextBuildNumber": BUILDS_PER_JOB + 1,
+            "upstreamProjects": [],
+            "downstreamProjects": [],
+            "property": []
+        })
+        return info
+
+    def config(self, job):
+        if job["name"] in self.configs:
+            return self.configs[job["name"]]
+        return CONFIG_XML % {"name": job["name"], "label": "linux"}
+
+    def console(self, job, number):
+        key = (job["name"], number)
+        if key not in self._consoles:
+            text = self.consoles.get(job["name"])
+            if text is None:
+                text = console_text(job["name"], number, self.console_size)
+            self._consoles[key] = text.encode("utf-8")
+        return self._consoles[key]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local Jenkins simulator.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--jobs", type=int, default=1000,
+                        help="jobs to generate when the fixture has none")
+    parser.add_argument("--fixture", help="JSON fixture file")
+    parser.add_argument("--latency", type=float, default=0,
+                        help="seconds to delay every request by")
+    parser.add_argument("--jitter", type=float, default=0,
+                        help="up to this many extra seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0,
+                        help="fraction of requests that fail with a 500")
+    parser.add_argument("--padding", type=int, default=0,
+                        help="pad JSON responses to this many bytes")
+    parser.add_argument("--console-size", type=int, default=10000,
+                        help="bytes of generated console output per build")
+    parser.add_argument("--progressive-chunk", type=int, default=4096,
+                        help="bytes returned per progressiveText poll")
+    parser.add_argument("--crumb", action="store_true",
+                        help="require a CSRF crumb")
+    args = parser.parse_args()
+
+    options = dict(job_count=args.jobs, port=args.port, latency=args.latency,
+                   jitter=args.jitter, error_rate=args.error_rate,
+                   padding=args.padding, console_size=args.console_size,
+                   progressive_chunk=args.progressive_chunk, crumb=args.crumb)
+    if args.fixture:
+        server = StubJenkins.from_fixture(args.fixture, **options)
+    else:
+        server = StubJenkins(**options)
+    print("Serving %d jobs at %s" % (len(server.jobs), server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.hits, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -47,6 +47,8 @@ See examples at :doc:`example`
 
 import base64
 import json
+import re
+import time
 
 import six
 from six.moves.http_client import BadStatusLine
@@ -62,11 +64,14 @@ LAUNCHER_WINDOWS_SERVICE = 'hudson.os.windows.ManagedWindowsServiceLauncher'
 
 DEFAULT_CONN_TIMEOUT = 120
 INFO = 'api/json'
+INFO_TREE = 'api/json?tree=%(tree)s'
 PLUGIN_INFO = 'pluginManager/api/json?depth=%(depth)s'
+PLUGIN_INFO_TREE = 'pluginManager/api/json?tree=%(tree)s'
 CRUMB_URL = 'crumbIssuer/api/json'
 JOB_INFO = 'job/%(name)s/api/json?depth=%(depth)s'
 JOB_NAME = 'job/%(name)s/api/json?tree=name'
 Q_INFO = 'queue/api/json?depth=0'
+Q_INFO_TREE = 'queue/api/json?tree=%(tree)s'
 CANCEL_QUEUE = 'queue/cancelItem?id=%(id)s'
 CREATE_JOB = 'createItem?name=%(name)s'  # also post config.xml
 CONFIG_JOB = 'job/%(name)s/config.xml'
@@ -84,6 +89,7 @@ BUILD_CONSOLE_OUTPUT = 'job/%(name)s/%(number)d/consoleText'
 CREATE_NODE = 'computer/doCreateItem?%s'
 DELETE_NODE = 'computer/%(name)s/doDelete'
 NODE_INFO = 'computer/%(name)s/api/json?depth=%(depth)s'
+NODE_LIST = 'computer/api/json?tree=%(tree)s'
 NODE_TYPE = 'hudson.slaves.DumbSlave$DescriptorImpl'
 TOGGLE_OFFLINE = 'computer/%(name)s/toggleOffline?offlineMessage=%(msg)s'
 CONFIG_NODE = 'computer/%(name)s/config.xml'
@@ -146,6 +152,40 @@ def auth_headers(username, password):
     return b'Basic ' + base64.b64encode(auth)
 
 
+#: URL templates, most specific first, by which :meth:`Jenkins.url_template`
+#: names requests
+URL_TEMPLATES = [
+    'INFO_TREE', 'INFO', 'PLUGIN_INFO_TREE', 'PLUGIN_INFO', 'CRUMB_URL',
+    'JOB_NAME', 'JOB_INFO', 'Q_INFO_TREE', 'Q_INFO', 'CANCEL_QUEUE',
+    'CREATE_JOB', 'CONFIG_JOB', 'DELETE_JOB', 'ENABLE_JOB', 'DISABLE_JOB',
+    'COPY_JOB', 'RENAME_JOB', 'BUILD_JOB', 'STOP_BUILD',
+    'BUILD_WITH_PARAMS_JOB', 'BUILD_INFO', 'BUILD_CONSOLE_OUTPUT',
+    'CREATE_NODE', 'DELETE_NODE', 'NODE_LIST', 'NODE_INFO', 'TOGGLE_OFFLINE',
+    'CONFIG_NODE']
+
+
+def _template_pattern(template):
+    # Named fields are single (quoted) path segments or query values, a bare
+    # %s is a whole query string
+    parts = re.split(r'(%\(\w+\)[sd]|%s)', template)
+    pattern = ''
+    for i, part in enumerate(parts):
+        if not i % 2:
+            pattern += re.escape(part)
+        elif part == '%s':
+            pattern += '.*'
+        else:
+            pattern += '[^/?&]*'
+    if '?' not in template:
+        # e.g. buildWithParameters appends the parameters
+        pattern += r'(\?.*)?'
+    return re.compile(pattern + '$')
+
+
+_URL_PATTERNS = [(name, _template_pattern(globals()[name]))
+                 for name in URL_TEMPLATES]
+
+
 class Jenkins(object):
 
     def __init__(self, url, username=None, password=None, timeout=DEFAULT_CONN_TIMEOUT):
@@ -168,6 +208,9 @@ class Jenkins(object):
             self.auth = None
         self.crumb = None
         self.timeout = timeout
+        #: Called after every request as ``request_hook(template, url,
+        #: status, size, seconds)``, see :meth:`jenkins_open`
+        self.request_hook = None
 
     def _get_encoded_params(self, params):
         for k, v in params.items():
@@ -238,19 +281,46 @@ class Jenkins(object):
         for k, v in self.get_job_info(job_name).items():
             print(k, v)
 
+    def url_template(self, url):
+        '''Name of the URL template a request URL was built from.
+
+        :param url: full request URL, ``str``
+        :returns: name from :data:`URL_TEMPLATES`, e.g. ``'JOB_INFO'``, or
+                  ``'OTHER'`` for URLs not built from a template, ``str``
+        '''
+        if url.startswith(self.server):
+            url = url[len(self.server):]
+        for name, pattern in _URL_PATTERNS:
+            if pattern.match(url):
+                return name
+        return 'OTHER'
+
     def jenkins_open(self, req, add_crumb=True):
         '''Utility routine for opening an HTTP request to a Jenkins server.
 
         This should only be used to extends the :class:`Jenkins` API.
+
+        If :attr:`request_hook` is set, it is called with the request's
+        URL template (see :meth:`url_template`), URL, HTTP status
+        (``None`` if the server could not be reached), response size in
+        bytes and duration in seconds. The crumb request, if any, is
+        reported separately.
         '''
+        start = status = None
+        size = 0
         try:
             if self.auth:
                 req.add_header('Authorization', self.auth)
             if add_crumb:
                 self.maybe_add_crumb(req)
-            response = urlopen(req, timeout=self.timeout).read()
+            start = time.time()
+            response = urlopen(req, timeout=self.timeout)
+            status = response.getcode()
+            response = response.read()
+            size = len(response)
             return response
         except HTTPError as e:
+            status = e.code
             # Jenkins's funky authentication means its nigh impossible to
             # distinguish errors.
             if e.code in [401, 403, 500]:
@@ -267,6 +337,11 @@ class Jenkins(object):
                 raise NotFoundException('Requested item could not be found')
         except URLError as e:
                 raise JenkinsException('Error in request: %s' % (e.reason))
+        finally:
+            if self.request_hook and start is not None:
+                url = req.get_full_url()
+                self.request_hook(self.url_template(url), url, status, size,
+                                  time.time() - start)
 
     def get_build_info(self, name, number, depth=0):
         '''Get build information dictionary.
@@ -303,8 +378,10 @@ class Jenkins(object):
                 % (name, number)
             )
 
-    def get_queue_info(self):
-        ''':returns: list of job dictionaries, ``[dict]``
+    def get_queue_info(self, tree=None):
+        ''':param tree: restrict the response to these fields (Jenkins
+                     ``tree`` syntax, e.g. ``items[id,why]``), ``str``
+        :returns: list of job dictionaries, ``[dict]``
 
         Example::
             >>> j = Jenkins()
@@ -312,9 +389,11 @@ class Jenkins(object):
             >>> print(queue_info[0])
             {u'task': {u'url': u'http://your_url/job/my_job/', u'color': u'aborted_anime', u'name': u'my_job'}, u'stuck': False, u'actions': [{u'causes': [{u'shortDescription': u'Started by timer'}]}], u'buildable': False, u'params': u'', u'buildableStartMilliseconds': 1315087293316, u'why': u'Build #2,532 is already in progress (ETA:10 min)', u'blocked': True}
         '''
-        return json.loads(self.jenkins_open(
-            Request(self.server + Q_INFO)
-        ))['items']
+        if tree:
+            url = self.server + Q_INFO_TREE % {'tree': quote(tree, ',[]')}
+        else:
+            url = self.server + Q_INFO
+        return json.loads(self.jenkins_open(Request(url)))['items']
 
     def cancel_queue(self, id):
         '''Cancel a queued build.
@@ -332,11 +411,13 @@ class Jenkins(object):
             # mechanism, so ignore it
             pass
 
-    def get_info(self):
+    def get_info(self, tree=None):
         """Get information on this Master.
 
         This information includes job list and view information.
 
+        :param tree: restrict the response to these fields (Jenkins
+                     ``tree`` syntax, e.g. ``jobs[name,color]``), ``str``
         :returns: dictionary of information about Master, ``dict``
 
         Example::
@@ -349,9 +430,12 @@ class Jenkins(object):
             u'name': u'my_job'}
 
         """
+        if tree:
+            url = self.server + INFO_TREE % {'tree': quote(tree, ',[]')}
+        else:
+            url = self.server + INFO
         try:
-            return json.loads(self.jenkins_open(
-                Request(self.server + INFO)))
+            return json.loads(self.jenkins_open(Request(url)))
         except HTTPError:
             raise JenkinsException("Error communicating with server[%s]"
                                    % self.server)
@@ -387,13 +471,16 @@ class Jenkins(object):
             raise JenkinsException("Error communicating with server[%s]"
                                    % self.server)
 
-    def get_plugins_info(self, depth=2):
+    def get_plugins_info(self, depth=2, tree=None):
         """Get all installed plugins information on this Master.
 
         This method retrieves information about each plugin that is installed
         on master.
 
         :param depth: JSON depth, ``int``
+        :param tree: restrict the response to these fields (Jenkins
+                     ``tree`` syntax, e.g. ``plugins[shortName,version]``).
+                     Takes precedence over ``depth``, ``str``
         :returns: info on all plugins ``[dict]``
 
         Example::
@@ -410,9 +497,12 @@ class Jenkins(object):
             u'gearman-plugin', u'bundled': False}, ..]
 
         """
+        if tree:
+            url = self.server + PLUGIN_INFO_TREE % {'tree': quote(tree, ',[]')}
+        else:
+            url = self.server + PLUGIN_INFO % locals()
         try:
-            plugins_info = json.loads(self.jenkins_open(
-                Request(self.server + PLUGIN_INFO % locals())))
+            plugins_info = json.loads(self.jenkins_open(Request(url)))
             return plugins_info['plugins']
         except HTTPError:
             raise JenkinsException("Error communicating with server[%s]"
@@ -636,6 +726,35 @@ class Jenkins(object):
             raise JenkinsException("Could not parse JSON info for node[%s]"
                                    % name)
 
+    def get_computer_info(self, tree='computer[displayName,offline]'):
+        '''Get information on all nodes (computers) in a single request.
+
+        Prefer this over calling :meth:`Jenkins.get_node_info` for every
+        node.
+
+        :param tree: restrict the response to these fields (Jenkins
+                     ``tree`` syntax), ``str``
+        :returns: dictionary of computer information, ``dict``
+
+        Example::
+
+            >>> j = Jenkins()
+            >>> info = j.get_computer_info(
+            ...     'busyExecutors,totalExecutors,computer[displayName]')
+            >>> print(info)
+            {u'busyExecutors': 3, u'totalExecutors': 8, u'computer':
+            [{u'displayName': u'master'}, {u'displayName': u'agent-01'}]}
+        '''
+        try:
+            return json.loads(self.jenkins_open(Request(
+                self.server + NODE_LIST % {'tree': quote(tree, ',[]')})))
+        except HTTPError:
+            raise JenkinsException("Error communicating with server[%s]"
+                                   % self.server)
+        except ValueError:
+            raise JenkinsException("Could not parse JSON info for server[%s]"
+                                   % self.server)
+
     def node_exists(self, name):
         '''Check whether a node exists
 
@@ -1,3 +1,8 @@
 # -*- coding: utf-8 -*-
 
-QUERY_DELIMITER = u"⟩"
\ No newline at end of file
+QUERY_DELIMITER = u"⟩"
+# Fastest loader for the job-list shaped caches, see benchmarks/bench_serializers.py
+CACHE_SERIALIZER = "marshal"
+
+# Seconds after which Alfred 3+ re-runs a menu that is waiting for data
+FETCH_RERUN = 0.5
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import time
+
+from workflow import manager
+from workflow.workflow import LockFile
+
+CACHE_BUDGET_MB = 100
+# Entries not modified for this long are dropped even under budget.  Anything
+# not listed only goes when the budget forces it out.
+CACHE_TTLS = {
+    "dashboard": 3600,
+    "nodes": 86400,
+    "plugins": 7 * 86400,
+    "jobs": 7 * 86400,
+    "configs": 30 * 86400
+}
+# Cache files that only make sense together are accounted and evicted as one
+# entry: the config index is useless without the config files and vice versa,
+# and the indexes of the job list must go when the job list does.
+ENTRY_GROUPS = {
+    "config_index": "configs",
+    "job_atoms": "jobs",
+    "job_fields": "jobs"
+}
+
+
+def format_size(size):
+    if size < 1024:
+        return "%d B" % size
+    for unit in ("KB", "MB", "GB"):
+        size /= 1024.0
+        if size < 1024:
+            break
+    return "%.1f %s" % (size, unit)
+
+
+def path_usage(path):
+    """Return (size, last access) of a file, or summed over a directory."""
+    if not os.path.isdir(path):
+        stat = os.stat(path)
+        return stat.st_size, stat.st_atime
+    size, accessed = 0, os.stat(path).st_atime
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            stat = os.stat(os.path.join(dirpath, filename))
+            size += stat.st_size
+            accessed = max(accessed, stat.st_atime)
+    return size, accessed
+
+
+class CacheManager(object):
+
+    def __init__(self, wf):
+        self.wf = wf
+
+    @property
+    def budget(self):
+        return int(float(self.wf.settings.get("cache_budget_mb", CACHE_BUDGET_MB)) * 1024 * 1024)
+
+    def _entry_name(self, filename):
+        name, ext = os.path.splitext(filename)
+        if ext[1:] in manager.serializers:
+            filename = name
+        return ENTRY_GROUPS.get(filename, filename)
+
+    def _is_internal(self, filename):
+        # Lock files must never be deleted (see LockFile), temp files belong to
+        # writers in progress, background tasks keep their arguments and pid
+        # here while they run and dotfiles and the log are not ours to evict
+        return (filename.endswith((".lock", ".tmp", ".argcache", ".pid")) or
+                filename.startswith((".", os.path.basename(self.wf.logfile))))
+
+    def entries(self):
+        entries = {}
+        for filename in os.listdir(self.wf.cachedir):
+            if self._is_internal(filename):
+                continue
+            path = os.path.join(self.wf.cachedir, filename)
+            try:
+                size, accessed = path_usage(path)
+                modified = os.stat(path).st_mtime
+            except OSError:  # Removed under our feet
+                continue
+            name = self._entry_name(filename)
+            entry = entries.setdefault(name, {
+                "name": name,
+                "paths": [],
+                "size": 0,
+                "accessed": 0,
+                "modified": 0
+            })
+            entry["paths"].append(path)
+            entry["size"] += size
+            entry["accessed"] = max(entry["accessed"], accessed)
+            entry["modified"] = max(entry["modified"], modified)
+        return sorted(entries.values(), key=lambda e: e["accessed"], reverse=True)
+
+    def stats(self):
+        entries = self.entries()
+        return {
+            "entries": len(entries),
+            "size": sum(e["size"] for e in entries),
+            "budget": self.budget
+        }
+
+    def expires(self, entry):
+        ttl = CACHE_TTLS.get(entry["name"])
+        return ttl and entry["modified"] + ttl
+
+    def remove(self, entry):
+        # Leave entries that are being regenerated alone, the new copy is
+        # about to replace them anyway
+        locks = [LockFile(path) for path in entry["paths"]]
+        try:
+            if not all(lock.acquire(blocking=False) for lock in locks):
+                return False
+            for path in entry["paths"]:
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                elif os.path.exists(path):
+                    os.unlink(path)
+        finally:
+            for lock in locks:
+                lock.release()
+        self.wf.logger.debug("Evicted %s from the cache" % entry["name"])
+        return True
+
+    def clear(self, name=None):
+        return [e["name"] for e in self.entries()
+                if name in (None, e["name"]) and self.remove(e)]
+
+    def enforce(self):
+        now = time.time()
+        entries = self.entries()
+        evicted = []
+        for entry in entries:
+            expires = self.expires(entry)
+            if expires and expires < now and self.remove(entry):
+                evicted.append(entry)
+        kept = [e for e in entries if e not in evicted]
+        size = sum(e["size"] for e in kept)
+        # Least recently used last
+        while kept and size > self.budget:
+            entry = kept.pop()
+            if self.remove(entry):
+                evicted.append(entry)
+                size -= entry["size"]
+        return [e["name"] for e in evicted]
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+import re
+import string
+
+try:
+    import xml.etree.cElementTree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
+
+# Jenkins writes `<?xml version='1.1' ...?>`, which expat refuses to parse
+xml_declaration = re.compile(r"^\s*<\?xml[^>]*\?>")
+split_tokens = re.compile(r"\w+", re.UNICODE).findall
+# Postings are sharded by the first character of the token
+SHARD_CHARS = string.ascii_lowercase + string.digits
+
+
+def tokenize(text):
+    return [t.lower() for t in split_tokens(text)]
+
+
+def tokenize_config(config_xml):
+    tokens = set()
+    try:
+        root = ET.fromstring(xml_declaration.sub("", config_xml, 1))
+    except ET.ParseError:
+        tokens.update(tokenize(config_xml.decode("utf-8", "replace")))
+        return tokens
+    for elem in root.iter():
+        tokens.update(tokenize(elem.tag))
+        for value in elem.attrib.values():
+            tokens.update(tokenize(value))
+        if elem.text:
+            tokens.update(tokenize(elem.text))
+    return tokens
+
+
+def shard_key(token):
+    return token[:1] if token[:1] in SHARD_CHARS else "_"
+
+
+class ConfigIndex(object):
+    """Inverted index of job configs.
+
+    Postings refer to jobs by id and are stored in shards by the first
+    character of the token, so a search only loads the names and the shards
+    of the words typed.  The job -> tokens map needed to update the index is
+    only loaded by `update`.
+    """
+
+    def __init__(self, wf):
+        self.wf = wf
+        data = wf.stored_data("config_index") or {}
+        # job names by id, None for removed jobs
+        self.names = data.get("names", [])
+        # shard key -> token -> set of job ids, loaded as needed
+        self.shards = {}
+        self.dirty = set()
+        # job name -> set of tokens, so a changed config can be unindexed
+        self.jobs = None
+
+    @property
+    def count(self):
+        return len(self.names) - self.names.count(None)
+
+    def shard(self, key):
+        if key not in self.shards:
+            self.shards[key] = self.wf.stored_data("config_index_%s" % key) or {}
+        return self.shards[key]
+
+    def postings(self, token):
+        return self.shard(shard_key(token)).get(token, set())
+
+    def load_jobs(self):
+        if self.jobs is None:
+            self.jobs = self.wf.stored_data("config_index_jobs") or {}
+        return self.jobs
+
+    def remove(self, name, job_id):
+        for token in self.load_jobs().pop(name, ()):
+            key = shard_key(token)
+            ids = self.shard(key).get(token)
+            if ids:
+                ids.discard(job_id)
+                if not ids:
+                    del self.shards[key][token]
+                self.dirty.add(key)
+
+    def add(self, name, job_id, config_xml):
+        tokens = tokenize_config(config_xml)
+        self.load_jobs()[name] = tokens
+        for token in tokens:
+            key = shard_key(token)
+            self.shard(key).setdefault(token, set()).add(job_id)
+            self.dirty.add(key)
+
+    def update(self, configs, names):
+        ids = dict((name, i) for i, name in enumerate(self.names) if name is not None)
+        for name in names:
+            job_id = ids.get(name)
+            if job_id is not None:
+                self.remove(name, job_id)
+            config_xml = configs.get(name)
+            if config_xml is None:
+                if job_id is not None:
+                    self.names[job_id] = None
+                continue
+            if job_id is None:
+                job_id = ids[name] = len(self.names)
+                self.names.append(name)
+            self.add(name, job_id, config_xml)
+        self.save()
+
+    def rebuild(self, configs):
+        self.names = []
+        self.jobs = {}
+        # Overwrite every shard, including those no token maps to any more
+        self.shards = dict((key, {}) for key in SHARD_CHARS + "_")
+        self.dirty = set(self.shards)
+        self.update(configs, configs.index.keys())
+
+    def save(self):
+        for key in self.dirty:
+            self.wf.store_data("config_index_%s" % key, self.shards[key])
+        self.dirty = set()
+        if self.jobs is not None:
+            self.wf.store_data("config_index_jobs", self.jobs)
+        self.wf.store_data("config_index", {"names": self.names})
+
+    def prefixed(self, prefix):
+        ids = set()
+        for token, token_ids in self.shard(shard_key(prefix)).items():
+            if token.startswith(prefix):
+                ids.update(token_ids)
+        return ids
+
+    def search(self, query):
+        # Every word must appear in the config; the last one may be partial
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        matches = None
+        for token in sorted(tokens[:-1], key=lambda t: len(self.postings(t))):
+            ids = self.postings(token)
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+        last = self.prefixed(tokens[-1])
+        matches = last if matches is None else matches & last
+        return sorted((self.names[i] for i in matches), key=lambda n: n.lower())
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import difflib
+import hashlib
+import json
+import os
+import time
+
+from workflow.workflow import atomic_writer
+
+from jenkins import JenkinsException
+
+# Jenkins exposes no modification time or hash for config.xml, so changes
+# are detected from a signature over the config-derived fields the JSON API
+# does expose.  Edits the probe can't see (e.g. a shell step) are picked up
+# once a cached copy is older than CONFIG_MAX_AGE.
+PROBE_TREE = ("jobs[name,displayName,description,buildable,concurrentBuild,"
+              "keepDependencies,upstreamProjects[name],downstreamProjects[name],"
+              "property[parameterDefinitions[name,type]]]")
+
+CONFIG_MAX_AGE = 86400
+CONFIG_VERSIONS = 5
+# Persist progress every so often so an interrupted sync isn't lost
+SAVE_EVERY = 100
+
+
+def job_signature(job):
+    return hashlib.sha1(json.dumps(job, sort_keys=True)).hexdigest()
+
+
+class ConfigCache(object):
+
+    def __init__(self, wf):
+        self.wf = wf
+        self.dirpath = os.path.join(wf.cachedir, "configs")
+        if not os.path.exists(self.dirpath):
+            os.makedirs(self.dirpath)
+        # job name -> {"signature", "fetched", "versions": [digest, ...]}
+        # Versions are oldest first.  Config files are stored by digest, so
+        # jobs sharing a config (common with templated jobs) share a file.
+        self.index = wf.cached_data("config_index", max_age=0) or {}
+
+    def path(self, digest):
+        return os.path.join(self.dirpath, "%s.xml" % digest)
+
+    def versions(self, name):
+        entry = self.index.get(name)
+        return entry and entry["versions"] or []
+
+    def get(self, name, version=-1):
+        versions = self.versions(name)
+        if not versions:
+            return None
+        with open(self.path(versions[version]), "rb") as file_obj:
+            return file_obj.read()
+
+    def diff(self, name, old=-2, new=-1):
+        versions = self.versions(name)
+        if len(versions) < 2:
+            return []
+        return list(difflib.unified_diff(
+            self.get(name, old).splitlines(), self.get(name, new).splitlines(),
+            "%s@%s" % (name, versions[old][:8]), "%s@%s" % (name, versions[new][:8]),
+            lineterm=""))
+
+    def is_stale(self, name, signature, max_age=CONFIG_MAX_AGE):
+        entry = self.index.get(name)
+        if not entry or not entry["versions"]:
+            return True
+        if entry["signature"] != signature:
+            return True
+        return time.time() - entry["fetched"] > max_age
+
+    def store(self, name, signature, config_xml):
+        digest = hashlib.sha1(config_xml).hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            with atomic_writer(path) as file_obj:
+                file_obj.write(config_xml)
+        entry = self.index.setdefault(name, {"versions": []})
+        entry["signature"] = signature
+        entry["fetched"] = time.time()
+        if entry["versions"][-1:] != [digest]:
+            entry["versions"].append(digest)
+            del entry["versions"][:-CONFIG_VERSIONS]
+            return True
+        return False
+
+    def sync(self, jenkins, max_age=CONFIG_MAX_AGE):
+        # One probe request, then only refetch configs whose signature
+        # changed or whose cached copy expired.  Returns the names of jobs
+        # whose config actually changed (or that were removed).
+        jobs = jenkins.get_info(tree=PROBE_TREE).get("jobs", [])
+        changed = []
+        fetched = 0
+        for job in jobs:
+            name = job.get("name")
+            signature = job_signature(job)
+            if not name or not self.is_stale(name, signature, max_age):
+                continue
+            try:
+                # The client quotes names into URLs, which only works on bytes
+                config_xml = jenkins.get_job_config(name.encode("utf-8"))
+            except JenkinsException as err:
+                # e.g. deleted since the probe: skip it, don't lose the sync
+                self.wf.logger.warning("Could not fetch config of %s: %s" % (name, err))
+                continue
+            if self.store(name, signature, config_xml):
+                changed.append(name)
+            fetched += 1
+            if fetched % SAVE_EVERY == 0:
+                self.save()
+
+        names = set(job.get("name") for job in jobs)
+        for name in list(self.index):
+            if name not in names:
+                del self.index[name]
+                changed.append(name)
+
+        self.wf.logger.debug("Synced configs: %d fetched, %d changed, %d cached"
+                             % (fetched, len(changed), len(self.index)))
+        self.save()
+        return changed
+
+    def save(self):
+        self.wf.cache_data("config_index", self.index)
+        referenced = set()
+        for entry in self.index.values():
+            referenced.update(entry["versions"])
+        for filename in os.listdir(self.dirpath):
+            if filename[:-len(".xml")] not in referenced:
+                os.unlink(os.path.join(self.dirpath, filename))
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import sys
+import time
+
+from workflow import PasswordNotFound
+from workflow.workflow import atomic_writer
+
+# Reading the keychain spawns a `security` process, far too slow to do on
+# every keystroke.  Secrets are kept in a user-only file for this long.
+CREDENTIAL_TTL = 300
+# Dotfile, so the cache manager neither lists nor evicts it
+CREDENTIAL_CACHE = ".credentials.json"
+
+
+def write_private_json(path, data):
+    with atomic_writer(path) as file_obj:
+        os.fchmod(file_obj.fileno(), 0600)
+        json.dump(data, file_obj)
+
+
+def read_json(path):
+    try:
+        with open(path, "rb") as file_obj:
+            return json.load(file_obj)
+    except (IOError, ValueError):
+        return {}
+
+
+class KeychainBackend(object):
+
+    # Secrets may be kept in the CREDENTIAL_CACHE file
+    cacheable = True
+
+    def __init__(self, wf):
+        self.wf = wf
+
+    def get(self, account):
+        try:
+            return self.wf.get_password(account)
+        except PasswordNotFound:
+            return None
+
+    def set(self, account, secret):
+        self.wf.save_password(account, secret)
+
+
+class FileBackend(object):
+    # For machines without a keychain, e.g. Linux
+
+    cacheable = True
+
+    def __init__(self, wf):
+        self.path = wf.datafile("credentials.json")
+
+    def get(self, account):
+        return read_json(self.path).get(account)
+
+    def set(self, account, secret):
+        secrets = read_json(self.path)
+        secrets[account] = secret
+        write_private_json(self.path, secrets)
+
+
+class EnvBackend(object):
+    # Read-only: "jenkins_api_key" comes from $JENKY_JENKINS_API_KEY
+
+    # Reading the environment is free, and the point of this backend is to
+    # keep secrets off the disk
+    cacheable = False
+
+    def __init__(self, wf):
+        self.wf = wf
+
+    def get(self, account):
+        secret = os.getenv("JENKY_%s" % account.upper())
+        return secret and self.wf.decode(secret)
+
+    def set(self, account, secret):
+        raise ValueError("Set $JENKY_%s to change %s" % (account.upper(), account))
+
+
+backends = {
+    "keychain": KeychainBackend,
+    "file": FileBackend,
+    "env": EnvBackend
+}
+
+
+def default_backend():
+    return sys.platform == "darwin" and "keychain" or "file"
+
+
+class CredentialProvider(object):
+
+    def __init__(self, wf, backend=None):
+        self.wf = wf
+        backend = backend or wf.settings.get("credential_backend") or default_backend()
+        if backend not in backends:
+            wf.logger.warning("Unknown credential_backend %r, using %s (one of: %s)",
+                              backend, default_backend(), ", ".join(sorted(backends)))
+            backend = default_backend()
+        self.backend = backends[backend](wf)
+        self.cache_path = wf.cachefile(CREDENTIAL_CACHE)
+        self.secrets = {}
+
+    def get(self, account):
+        if account not in self.secrets:
+            if self.backend.cacheable:
+                self.secrets[account] = self._cached(account)
+            else:
+                self.secrets[account] = None
+                self._uncache(account)
+        if self.secrets[account] is None:
+            self.secrets[account] = self.backend.get(account)
+            if self.secrets[account] is not None and self.backend.cacheable:
+                self._cache(account, self.secrets[account])
+        return self.secrets[account]
+
+    def set(self, account, secret):
+        self.backend.set(account, secret)
+        self.secrets[account] = secret
+        if self.backend.cacheable:
+            self._cache(account, secret)
+
+    def _cached(self, account):
+        entry = read_json(self.cache_path).get(account)
+        if entry and entry["expires"] > time.time():
+            return entry["secret"]
+        return None
+
+    def _cache(self, account, secret):
+        now = time.time()
+        cached = dict((k, v) for k, v in read_json(self.cache_path).items()
+                      if v["expires"] > now)
+        cached[account] = {"secret": secret, "expires": now + CREDENTIAL_TTL}
+        write_private_json(self.cache_path, cached)
+
+    def _uncache(self, account):
+        # Drop a copy cached while another backend was configured
+        cached = read_json(self.cache_path)
+        if account in cached:
+            del cached[account]
+            write_private_json(self.cache_path, cached)
+
+
+_providers = {}
+
+
+def get_credentials(wf):
+    # One provider per run, so a secret is looked up at most once
+    if wf not in _providers:
+        _providers[wf] = CredentialProvider(wf)
+    return _providers[wf]
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import time
+
+DASHBOARD_MAX_AGE = 30
+
+# Also carries everything the node index needs, so a dashboard refresh keeps
+# the node index up to date without a second request.
+COMPUTER_TREE = ("busyExecutors,totalExecutors,"
+                 "computer[displayName,offline,temporarilyOffline,numExecutors,"
+                 "assignedLabels[name],executors[idle]]")
+QUEUE_TREE = "items[id,why,stuck,blocked,buildable,inQueueSince,task[name,url]]"
+
+
+def build_dashboard(computers, queue):
+    nodes = []
+    for computer in computers.get("computer", []):
+        executors = computer.get("executors") or []
+        nodes.append({
+            "name": computer.get("displayName"),
+            "offline": computer.get("offline", False),
+            "executors": computer.get("numExecutors", len(executors)),
+            "busy": len([e for e in executors if not e.get("idle", True)])
+        })
+
+    items = []
+    for item in queue:
+        task = item.get("task") or {}
+        items.append({
+            "id": item.get("id"),
+            "name": task.get("name", "Unknown Job Name"),
+            "url": task.get("url"),
+            "why": item.get("why") or "",
+            "stuck": item.get("stuck", False),
+            "blocked": item.get("blocked", False),
+            "since": item.get("inQueueSince", 0) / 1000.0
+        })
+
+    return {
+        "fetched": time.time(),
+        "busy": computers.get("busyExecutors", 0),
+        "total": computers.get("totalExecutors", 0),
+        "nodes": nodes,
+        "queue": items
+    }
+
+
+def waiting_reasons(dashboard):
+    reasons = {}
+    for item in dashboard["queue"]:
+        reasons[item["why"]] = reasons.get(item["why"], 0) + 1
+    return sorted(reasons.items(), key=lambda r: (-r[1], r[0]))
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import bisect
+import re
+import urllib
+import urlparse
+
+# Jenkins encodes a job's last result, and whether it is building, in its
+# color.  A building job is listed under its last result and "building".
+STATUSES = {
+    "blue": "success",
+    "red": "failed",
+    "yellow": "unstable",
+    "aborted": "aborted",
+    "disabled": "disabled",
+    "notbuilt": "notbuilt"
+}
+BUILDING_SUFFIX = "_anime"
+
+# Field values are matched on their start for the short, fixed vocabularies
+# and anywhere for the free-form ones (server:eu, folder:payments)
+FIELD_MATCHERS = {
+    "status": lambda key, value: key.startswith(value),
+    "color": lambda key, value: key.startswith(value),
+    "folder": lambda key, value: value in key,
+    "server": lambda key, value: value in key
+}
+# Job name patterns, see jenky.patterns
+PATTERN_KINDS = ("re", "glob")
+field_token = re.compile(r"^(%s):(.*)$" % "|".join(list(FIELD_MATCHERS) + list(PATTERN_KINDS)),
+                         re.IGNORECASE)
+
+
+def parse_query(query):
+    """Split a jobs query into (field, value) predicates, (kind, pattern)
+    name patterns and the text to match job names against, e.g.
+    "status:failed re:^release deploy" into
+    ([("status", "failed")], [("re", "^release")], "deploy")."""
+    predicates = []
+    patterns = []
+    words = []
+    for token in query.split():
+        match = field_token.match(token)
+        if not match:
+            words.append(token)
+        elif not match.group(2):  # Still typing the value, don't narrow yet
+            continue
+        elif match.group(1).lower() in PATTERN_KINDS:
+            patterns.append((match.group(1).lower(), match.group(2)))
+        else:
+            predicates.append((match.group(1).lower(), match.group(2).lower()))
+    return predicates, patterns, " ".join(words)
+
+
+def job_fields(job):
+    color = job.get("color") or ""
+    base_color = color.replace(BUILDING_SUFFIX, "")
+    statuses = [STATUSES.get(base_color, base_color)]
+    if color.endswith(BUILDING_SUFFIX):
+        statuses.append("building")
+    url = urlparse.urlsplit(job.get("url") or "")
+    # .../job/folder/job/name/
+    names = [urllib.unquote(n.strip("/")) for n in url.path.split("/job/")[1:]]
+    return {
+        "status": statuses,
+        "color": [base_color],
+        "folder": ["/".join(names[:-1])],
+        "server": [url.netloc]
+    }
+
+
+class JobFieldIndex(object):
+    """Positions in the cached job list by field value, so field predicates
+    narrow the list before any fuzzy matching, and by name, so name patterns
+    only test the names that can match."""
+
+    def __init__(self, data):
+        # field -> lowercase value -> positions
+        self.fields = data["fields"]
+        # Sorted lowercase job names and their positions, None in indexes
+        # cached before name patterns
+        self.names = data.get("names")
+        self.order = data.get("order")
+        self.count = data["count"]
+
+    @classmethod
+    def build(cls, jobs):
+        fields = dict((field, {}) for field in FIELD_MATCHERS)
+        for i, job in enumerate(jobs):
+            for field, values in job_fields(job).items():
+                for value in values:
+                    if value:
+                        fields[field].setdefault(value.lower(), []).append(i)
+        names = sorted(((job.get("name") or "").lower(), i) for i, job in enumerate(jobs))
+        return cls({
+            "fields": fields,
+            "names": [name for name, i in names],
+            "order": [i for name, i in names],
+            "count": len(jobs)
+        })
+
+    @property
+    def data(self):
+        return {
+            "fields": self.fields,
+            "names": self.names,
+            "order": self.order,
+            "count": self.count
+        }
+
+    def first(self, prefix):
+        # Where names starting with prefix would begin in `names`
+        return bisect.bisect_left(self.names, prefix)
+
+    def lookup(self, field, value):
+        matches = FIELD_MATCHERS[field]
+        positions = set()
+        for key, indices in self.fields[field].items():
+            if matches(key, value):
+                positions.update(indices)
+        return positions
+
+    def select(self, predicates):
+        """Positions of the jobs matching all predicates."""
+        positions = None
+        # Every predicate must hold; start with the most selective
+        for found in sorted((self.lookup(f, v) for f, v in predicates), key=len):
+            positions = found if positions is None else positions & found
+            if not positions:
+                break
+        return positions
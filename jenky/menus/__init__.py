@@ -1,6 +1,13 @@
 from jenky.menus.initial import InitialMenu
+from jenky.menus.dashboard import DashboardMenu
+from jenky.menus.nodes import NodesMenu, NodeActionsMenu
+from jenky.menus.configs import ConfigSearchMenu
+from jenky.menus.plugins import PluginsMenu
+from jenky.menus.cache import CacheMenu
+from jenky.menus.diagnostics import DiagnosticsMenu
 from jenky.menus.settings import SettingsMenu, UsernameMenu, APIKeyMenu, HostnameMenu
 from jenky.menus.jobs import JobsMenu
 
 settings_menus = (UsernameMenu, APIKeyMenu, HostnameMenu, SettingsMenu)
-available_menus = (InitialMenu, JobsMenu)
\ No newline at end of file
+available_menus = (InitialMenu, DashboardMenu, NodeActionsMenu, NodesMenu, ConfigSearchMenu,
+                   PluginsMenu, CacheMenu, DiagnosticsMenu, JobsMenu)
\ No newline at end of file
@@ -1,8 +1,14 @@
 # -*- coding: utf-8 -*-
+import itertools
+
 from workflow import ICON_WARNING
 
 from jenky import QUERY_DELIMITER
 
+# Alfred only shows a handful of rows, don't build thousands of items.
+# Overridden by the "max_results" setting, 0 shows everything.
+MAX_RESULTS = 50
+
 class BaseMenu(object):
 
     query_match = None
@@ -28,11 +34,40 @@ class BaseMenu(object):
     def output(self):
         return self.query
 
+    @property
+    def result_count(self):
+        # Number of rows `items` would yield, if a menu knows it cheaply
+        return None
+
+    @property
+    def notice_count(self):
+        # Number of rows, such as warnings, `items` yields before the results
+        return 0
+
+    @property
+    def max_results(self):
+        return int(self.wf.settings.get("max_results", MAX_RESULTS))
+
     def __init__(self, wf, query):
         self.wf = wf
         self.query = query
 
     def set_menu(self):
-        for item in self.items:
-            self.wf.add_item(**item)
-        self.wf.send_feedback()
\ No newline at end of file
+        limit = self.max_results
+        if not limit:
+            self.wf.add_items(self.items)
+        else:
+            # `items` may be a generator: only build the rows Alfred shows
+            items = iter(self.items)
+            self.wf.add_items(itertools.islice(items, limit))
+            if next(items, None) is not None:
+                self.wf.add_item(**self.more_item(limit - self.notice_count))
+        self.wf.send_feedback()
+
+    def more_item(self, shown):
+        count = self.result_count
+        return {
+            "title": count and u"%d more matches…" % (count - shown) or u"More matches…",
+            "subtitle": "Keep typing to narrow down the results.",
+            "valid": False
+        }
\ No newline at end of file
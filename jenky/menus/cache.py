@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import re
+import time
+
+from workflow import ICON_BURN, ICON_INFO, ICON_TRASH
+
+from jenky import QUERY_DELIMITER
+from jenky.cache import CacheManager, format_size
+from jenky.menus.base import BaseMenu
+
+
+def format_age(seconds):
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return "%d%s" % (seconds // size, unit)
+    return "%ds" % seconds
+
+
+def entry_subtitle(entry, expires, now):
+    subtitle = u"%s · used %s ago" % (format_size(entry["size"]),
+                                      format_age(now - entry["accessed"]))
+    if expires:
+        subtitle += u" · expires in %s" % format_age(max(expires - now, 0))
+    return subtitle + u" · ↩ to clear"
+
+
+class CacheMenu(BaseMenu):
+
+    query_match = re.compile(u"^Cache %s" % QUERY_DELIMITER)
+
+    @property
+    def items(self):
+        size = sum(e["size"] for e in self.entries)
+        budget = self.cache.budget
+        items = [
+            {
+                "title": "Cache usage: %s of %s" % (format_size(size), format_size(budget)),
+                "subtitle": "%d entries. Evict expired and least recently used entries now." % len(self.entries),
+                "valid": True,
+                "arg": "jenky_action:trim_cache",
+                "variables": {"jenky_action": "trim_cache"},
+                "icon": ICON_INFO
+            }
+        ]
+        now = time.time()
+        for entry in self.matches:
+            items.append({
+                "title": entry["name"],
+                "subtitle": entry_subtitle(entry, self.cache.expires(entry), now),
+                "valid": True,
+                "arg": "jenky_action:clear_cache:%s" % entry["name"],
+                "variables": {"jenky_action": "clear_cache", "jenky_value": entry["name"]},
+                "uid": "cache-%s" % entry["name"],
+                "icon": ICON_TRASH
+            })
+        if self.search and not self.matches:
+            items.append({
+                "title": "No cache entries found matching \"%s\"." % self.search,
+                "valid": False
+            })
+        items.append({
+            "title": "Clear All Cached Data",
+            "subtitle": "Everything will be fetched from the server again on next use.",
+            "valid": True,
+            "arg": "jenky_action:clear_cache",
+            "variables": {"jenky_action": "clear_cache"},
+            "icon": ICON_BURN
+        })
+        return items
+
+    def __init__(self, wf, query):
+        super(CacheMenu, self).__init__(wf, query)
+        self.search = query.split(QUERY_DELIMITER)[1].strip()
+        self.cache = CacheManager(wf)
+        self.entries = self.cache.entries()
+        self.matches = self.entries
+        if self.search:
+            self.matches = wf.filter(self.search, self.entries,
+                                     key=lambda e: e["name"], min_score=20)
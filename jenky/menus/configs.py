@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import re
+
+from six.moves.urllib.parse import quote
+from workflow import ICON_CLOCK
+
+from jenky import FETCH_RERUN, QUERY_DELIMITER
+from jenky.config_index import ConfigIndex
+from jenky.menus.base import BaseMenu
+from jenky.server import refresh_in_background
+
+CONFIG_SYNC_INTERVAL = 3600
+
+class ConfigSearchMenu(BaseMenu):
+
+    query_match = re.compile(u"^Configs %s" % QUERY_DELIMITER)
+
+    @property
+    def items(self):
+        if not self.index.count:
+            return [
+                {
+                    "title": "Indexing job configurations...",
+                    "subtitle": "The first sync fetches every config.xml, later ones only what changed.",
+                    "valid": False,
+                    "icon": ICON_CLOCK
+                }
+            ]
+        if not self.search:
+            return [
+                {
+                    "title": "Search %d job configurations" % self.index.count,
+                    "subtitle": "Type a script name, label, credential id or plugin class...",
+                    "valid": False
+                }
+            ]
+        return self.results()
+
+    def results(self):
+        for name in self.matches:
+            url = "%sjob/%s/" % (self.server, quote(name.encode("utf-8")))
+            yield {
+                "title": name,
+                "subtitle": "Configuration matches \"%s\"" % self.search,
+                "valid": True,
+                "arg": url + "configure",
+                "uid": name
+            }
+        if not self.matches:
+            yield {
+                "title": "No job configurations contain \"%s\"." % self.search,
+                "valid": False
+            }
+
+    @property
+    def result_count(self):
+        return len(self.matches)
+
+    def __init__(self, wf, query):
+        super(ConfigSearchMenu, self).__init__(wf, query)
+        self.search = query.split(QUERY_DELIMITER)[1].strip()
+        self.server = wf.settings.get("jenkins_hostname", "").rstrip("/") + "/"
+        self.index = ConfigIndex(wf)
+        self.matches = self.search and self.index.search(self.search) or []
+        if not self.index.count:
+            wf.rerun = FETCH_RERUN
+        # An empty index may also be one from an older Jenky, waiting for
+        # a rebuild
+        if not self.index.count or not wf.cached_data_fresh("config_index", CONFIG_SYNC_INTERVAL):
+            refresh_in_background(wf, "configs")
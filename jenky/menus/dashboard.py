@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import re
+import time
+
+from workflow import ICON_CLOCK, ICON_NETWORK, ICON_WARNING
+
+from jenky import FETCH_RERUN, QUERY_DELIMITER
+from jenky.dashboard import DASHBOARD_MAX_AGE, waiting_reasons
+from jenky.menus.base import BaseMenu
+from jenky.server import refresh_in_background
+
+class DashboardMenu(BaseMenu):
+
+    query_match = re.compile(u"^Dashboard %s" % QUERY_DELIMITER)
+
+    @property
+    def items(self):
+        if not self.dashboard:
+            return [
+                {
+                    "title": "Fetching queue and executor status...",
+                    "subtitle": "Reopen this menu in a moment.",
+                    "valid": False,
+                    "icon": ICON_CLOCK
+                }
+            ]
+
+        queue = self.dashboard["queue"]
+        nodes = self.dashboard["nodes"]
+        online = [n for n in nodes if not n["offline"]]
+        busy = self.dashboard["busy"]
+        total = self.dashboard["total"]
+        items = [
+            {
+                "title": "%d item(s) in queue" % len(queue),
+                "subtitle": "%d stuck, %d blocked. Updated %ds ago." % (
+                    len([i for i in queue if i["stuck"]]),
+                    len([i for i in queue if i["blocked"]]),
+                    time.time() - self.dashboard["fetched"]),
+                "valid": False,
+                "icon": ICON_CLOCK
+            },
+            {
+                "title": "%d of %d executors busy" % (busy, total),
+                "subtitle": "%d idle on %d online node(s), %d node(s) offline." % (
+                    total - busy, len(online), len(nodes) - len(online)),
+                "valid": False,
+                "icon": ICON_NETWORK
+            }
+        ]
+        for why, count in waiting_reasons(self.dashboard):
+            items.append({
+                "title": why or "Waiting",
+                "subtitle": "%d queued item(s) waiting for this reason." % count,
+                "valid": False,
+                "icon": ICON_WARNING
+            })
+        for item in queue:
+            items.append({
+                "title": item["name"],
+                "subtitle": "Queued %ds: %s" % (time.time() - item["since"], item["why"]),
+                "valid": bool(item["url"]),
+                "arg": item["url"],
+                "uid": "queue-%s" % item["id"]
+            })
+        return items
+
+    def __init__(self, wf, query):
+        super(DashboardMenu, self).__init__(wf, query)
+        self.dashboard = wf.cached_data("dashboard", max_age=0)
+        if not self.dashboard:
+            wf.rerun = FETCH_RERUN
+        if not wf.cached_data_fresh("dashboard", DASHBOARD_MAX_AGE):
+            refresh_in_background(wf, "dashboard")
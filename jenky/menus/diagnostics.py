@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import re
+
+from workflow import ICON_INFO, ICON_TRASH, ICON_WARNING
+
+from jenky import QUERY_DELIMITER
+from jenky.cache import format_size
+from jenky.menus.base import BaseMenu
+from jenky.metrics import get_metrics
+
+
+def format_ms(seconds):
+    return "%d ms" % round(seconds * 1000)
+
+
+def endpoint_subtitle(endpoint):
+    subtitle = u"Latency p50 %s, p95 %s · size p50 %s, p95 %s" % (
+        format_ms(endpoint["p50"]), format_ms(endpoint["p95"]),
+        format_size(endpoint["size_p50"]), format_size(endpoint["size_p95"]))
+    if endpoint["errors"]:
+        subtitle += u" · %d error(s)" % endpoint["errors"]
+    return subtitle
+
+
+class DiagnosticsMenu(BaseMenu):
+
+    query_match = re.compile(u"^Diagnostics %s" % QUERY_DELIMITER)
+
+    @property
+    def items(self):
+        items = []
+        if not self.endpoints:
+            items.append({
+                "title": "No requests to Jenkins recorded yet.",
+                "subtitle": "Use Jenky for a while and come back.",
+                "valid": False,
+                "icon": ICON_INFO
+            })
+        for endpoint in self.matches:
+            items.append({
+                "title": "%s: %d request(s), %s in total" % (
+                    endpoint["template"], endpoint["count"], format_size(endpoint["bytes"])),
+                "subtitle": endpoint_subtitle(endpoint),
+                "valid": False,
+                "uid": "endpoint-%s" % endpoint["template"],
+                "icon": endpoint["errors"] and ICON_WARNING or ICON_INFO
+            })
+        if self.search and self.endpoints and not self.matches:
+            items.append({
+                "title": "No endpoints found matching \"%s\"." % self.search,
+                "valid": False
+            })
+        if self.endpoints:
+            items.append({
+                "title": "Reset Request Metrics",
+                "subtitle": "Start measuring from scratch.",
+                "valid": True,
+                "arg": "jenky_action:reset_metrics",
+                "variables": {"jenky_action": "reset_metrics"},
+                "icon": ICON_TRASH
+            })
+        return items
+
+    def __init__(self, wf, query):
+        super(DiagnosticsMenu, self).__init__(wf, query)
+        self.search = query.split(QUERY_DELIMITER)[1].strip()
+        # Slowest endpoints in total first: the best candidates for caching
+        self.endpoints = get_metrics(wf).summary()
+        self.matches = self.endpoints
+        if self.search:
+            self.matches = wf.filter(self.search, self.endpoints,
+                                     key=lambda e: e["template"], min_score=20)
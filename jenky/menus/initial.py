@@ -1,8 +1,9 @@
 # -*- coding: utf-8 -*-
 import re
 
-from workflow import ICON_SETTINGS, ICON_BURN
+from workflow import ICON_SETTINGS, ICON_BURN, ICON_CLOCK, ICON_NETWORK, ICON_INFO, ICON_SYNC, ICON_HELP
 
+from jenky import QUERY_DELIMITER
 from jenky.menus.base import BaseMenu
 
 class InitialMenu(BaseMenu):
@@ -17,6 +18,34 @@ class InitialMenu(BaseMenu):
                 "subtitle": "Start typing the name of a job...",
                 "valid": False
             },
+            {
+                "title": "Queue & Executors",
+                "subtitle": "See the build queue, why items are waiting and which executors are busy.",
+                "valid": False,
+                "autocomplete": u"Dashboard %s " % QUERY_DELIMITER,
+                "icon": ICON_CLOCK
+            },
+            {
+                "title": "Search Nodes",
+                "subtitle": "Find an agent by name or label, open it or take it offline.",
+                "valid": False,
+                "autocomplete": u"Nodes %s " % QUERY_DELIMITER,
+                "icon": ICON_NETWORK
+            },
+            {
+                "title": "Search Job Configurations",
+                "subtitle": "Find jobs whose config.xml uses a script, label, credential...",
+                "valid": False,
+                "autocomplete": u"Configs %s " % QUERY_DELIMITER,
+                "icon": ICON_INFO
+            },
+            {
+                "title": "Search Plugins",
+                "subtitle": "Look up installed plugins, their versions and available updates.",
+                "valid": False,
+                "autocomplete": u"Plugins %s " % QUERY_DELIMITER,
+                "icon": ICON_SYNC
+            },
             {
                 "title": "Go to Settings",
                 "subtitle": "You can change your username, API key and hostname here.",
@@ -25,10 +54,17 @@ class InitialMenu(BaseMenu):
                 "icon": ICON_SETTINGS
             },
             {
-                "title": "Clear Job Cache",
-                "subtitle": "Clear out the local Job cache. Data will be fetched from the server on next launch.",
-                "valid": True,
-                "arg": "jenky-clear-job-cache",
+                "title": "Cache Usage",
+                "subtitle": "See how much space cached data takes and clear what you don't need.",
+                "valid": False,
+                "autocomplete": u"Cache %s " % QUERY_DELIMITER,
                 "icon": ICON_BURN
+            },
+            {
+                "title": "Request Diagnostics",
+                "subtitle": "See how long requests to Jenkins take and how much they download.",
+                "valid": False,
+                "autocomplete": u"Diagnostics %s " % QUERY_DELIMITER,
+                "icon": ICON_HELP
             }
         ]
\ No newline at end of file
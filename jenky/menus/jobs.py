@@ -1,10 +1,20 @@
 # -*- coding: utf-8 -*-
+import os
 import re
 
-from jenkins import Jenkins
+from workflow import ICON_CLOCK, ICON_WARNING, MATCH_ALL, MATCH_TYPO
+from workflow.workflow import TypoIndex, file_stamp
 
-from jenky import QUERY_DELIMITER
+from jenky import FETCH_RERUN, QUERY_DELIMITER
+from jenky.job_query import JobFieldIndex, parse_query
 from jenky.menus.base import BaseMenu
+from jenky.patterns import PATTERN_TIME_BUDGET, PatternError, compile_pattern
+from jenky.server import get_jenkins
+from jenky.usage import UsageLog
+
+# How long to wait for another Jenky process that is already fetching the
+# job list before showing a placeholder
+JOBS_FETCH_TIMEOUT = 5
 
 class JobsMenu(BaseMenu):
 
@@ -12,42 +22,134 @@ class JobsMenu(BaseMenu):
 
     @property
     def items(self):
-        items = []
+        if self.jobs is None:
+            yield {
+                "title": "Fetching jobs from Jenkins...",
+                "subtitle": "Keep typing, results will show up once the job list has been cached.",
+                "valid": False,
+                "icon": ICON_CLOCK
+            }
+            return
+        if self.error:
+            yield {
+                "title": "Invalid pattern: %s" % self.error,
+                "subtitle": "re: takes a Python regular expression, glob: a shell-style pattern.",
+                "valid": False,
+                "icon": ICON_WARNING
+            }
+            return
+        if self.incomplete:
+            yield {
+                "title": "Pattern search stopped after %.1f seconds." % PATTERN_TIME_BUDGET,
+                "subtitle": "Not all jobs were searched, make the pattern more specific.",
+                "valid": False,
+                "icon": ICON_WARNING
+            }
         for job in self.jobs:
-            items.append({
+            yield {
                 "title": job.get("name", "Unknown Job Name"),
                 "subtitle": job.get("url", ""),
                 "valid": True,
-                "arg": job.get("url"),
-                "uid": job.get("name")
-            })
-        if not items:
-            items.append({
+                # Through action.py, which remembers the job for ranking
+                "arg": "jenky_action:open_job:%s" % job.get("url"),
+                "uid": job.get("name"),
+                "variables": {
+                    "jenky_action": "open_job",
+                    "jenky_value": job.get("url"),
+                    "jenky_job": job.get("name")
+                }
+            }
+        if not self.jobs:
+            yield {
                 "title": "No jobs found matching \"%s\"." % self.query,
                 "valid": False
-            })
-        return items
+            }
+
+    @property
+    def result_count(self):
+        return self.jobs and len(self.jobs)
+
+    @property
+    def notice_count(self):
+        return int(self.incomplete)
 
 
     def __init__(self, wf, query):
         super(JobsMenu, self).__init__(wf, query)
-        self.username = wf.settings.get("jenkins_username", None)
-        self.hostname = wf.settings.get("jenkins_hostname", None)
-        try:
-            self.api_key = wf.get_password("jenkins_api_key")
-        except PasswordNotFound:
-            self.api_key = None
 
         #TODO: Better handle missing/bad credentials
 
-        self.jobs = wf.cached_data("jobs", self.get_jobs, max_age=0)
-        if query:
-            self.jobs = wf.filter(query, self.jobs, key=self.search_key_for_job, min_score=20)
+        self.error = None
+        self.incomplete = False
+        self.jobs = wf.cached_data("jobs", self.get_jobs, max_age=0,
+                                   timeout=JOBS_FETCH_TIMEOUT)
+        # The indexes cover every job, whatever self.jobs is narrowed to
+        self.all_jobs = self.jobs
+        if self.jobs is None:
+            wf.rerun = FETCH_RERUN
+        elif query:
+            # Field predicates (status:failed, folder:payments...) and name
+            # patterns (re:..., glob:...) narrow the list through an index,
+            # the rest is fuzzy matched on job names
+            predicates, patterns, text = parse_query(query)
+            if predicates or patterns:
+                try:
+                    self.jobs = self.select_jobs(predicates, patterns)
+                except PatternError as err:
+                    self.error = err
+                    self.jobs = []
+                    return
+            boost = UsageLog(wf).boosts()
+            if text:
+                # Misspelt jobs show up after the exact matches, jobs opened
+                # often and recently before those that aren't
+                self.jobs = wf.filter(text, self.jobs, key=self.search_key_for_job, min_score=20,
+                                      match_on=MATCH_ALL | MATCH_TYPO,
+                                      typo_index=self.get_typo_index(), boost=boost)
+            else:
+                # A new list: the cached one is shared and indexed by position
+                self.jobs = sorted(self.jobs, key=lambda job: (-boost.get(self.search_key_for_job(job), 0),
+                                                               self.search_key_for_job(job).lower()))
 
     def get_jobs(self):
-        j = Jenkins(self.hostname, self.username, self.api_key)
+        j = get_jenkins(self.wf)
         jobs = j.get_jobs()
         return jobs
 
+    def select_jobs(self, predicates, patterns):
+        index = self.get_field_index()
+        positions = index.select(predicates) if predicates else None
+        for kind, source in patterns:
+            pattern = compile_pattern(kind, source)
+            if positions is not None and not positions:
+                break
+            positions, complete = pattern.select(index, positions)
+            self.incomplete = self.incomplete or not complete
+        return [self.all_jobs[i] for i in sorted(positions)]
+
+    def get_field_index(self):
+        data = self.wf.cached_data("job_fields", lambda: JobFieldIndex.build(self.all_jobs).data,
+                                   max_age=0)
+        index = JobFieldIndex(data)
+        if index.count != len(self.all_jobs) or index.names is None:
+            # The job list was fetched again since the index was built, or
+            # the index is from before name patterns
+            index = JobFieldIndex.build(self.all_jobs)
+            self.wf.cache_data("job_fields", index.data)
+        return index
+
+    def get_typo_index(self):
+        # Rebuilt whenever the job list is rewritten, which the file stamp of
+        # its cache tells (lists, as serializers may not keep tuples)
+        stamp = list(file_stamp(os.stat(self.wf.cachefile("jobs.%s" % self.wf.cache_serializer))))
+        data = self.wf.cached_data("job_atoms", max_age=0)
+        if not data or data.get("stamp") != stamp:
+            data = {
+                "stamp": stamp,
+                "grams": self.wf.typo_index(self.all_jobs, key=self.search_key_for_job).grams
+            }
+            self.wf.cache_data("job_atoms", data)
+        return TypoIndex(data["grams"])
+
     def search_key_for_job(self, job):
         return job.get("name", "")
\ No newline at end of file
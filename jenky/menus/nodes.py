@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import re
+
+from workflow import ICON_CLOCK, ICON_NETWORK, ICON_WARNING, ICON_WEB
+
+from jenky import FETCH_RERUN, QUERY_DELIMITER
+from jenky.menus.base import BaseMenu
+from jenky.nodes import NODES_MAX_AGE, search_key_for_node
+from jenky.server import refresh_in_background
+
+
+def node_subtitle(node):
+    state = node["offline"] and "Offline" or "Online"
+    labels = node["labels"] and ", ".join(node["labels"]) or "no labels"
+    return u"%s · %d executor(s) · %s" % (state, node["executors"], labels)
+
+
+class NodesMenu(BaseMenu):
+
+    query_match = re.compile(u"^Nodes %s" % QUERY_DELIMITER)
+
+    @property
+    def items(self):
+        if self.nodes is None:
+            yield {
+                "title": "Fetching nodes...",
+                "subtitle": "Reopen this menu in a moment.",
+                "valid": False,
+                "icon": ICON_CLOCK
+            }
+            return
+        for node in self.nodes:
+            yield {
+                "title": node["name"],
+                "subtitle": node_subtitle(node),
+                "valid": True,
+                "arg": node["url"],
+                "autocomplete": u"Nodes %s %s %s " % (
+                    QUERY_DELIMITER, node["name"], QUERY_DELIMITER),
+                "uid": "node-%s" % node["name"],
+                "icon": node["offline"] and ICON_WARNING or ICON_NETWORK
+            }
+        if not self.nodes:
+            yield {
+                "title": "No nodes found matching \"%s\"." % self.search,
+                "valid": False
+            }
+
+    @property
+    def result_count(self):
+        return self.nodes and len(self.nodes)
+
+    def __init__(self, wf, query):
+        super(NodesMenu, self).__init__(wf, query)
+        self.search = query.split(QUERY_DELIMITER)[1].strip()
+        self.nodes = wf.cached_data("nodes", max_age=0)
+        if self.nodes is None:
+            wf.rerun = FETCH_RERUN
+        if not wf.cached_data_fresh("nodes", NODES_MAX_AGE):
+            refresh_in_background(wf, "nodes")
+        if self.nodes and self.search:
+            self.nodes = wf.filter(self.search, self.nodes,
+                                   key=search_key_for_node, min_score=20)
+
+
+class NodeActionsMenu(BaseMenu):
+
+    query_match = re.compile(u"^Nodes %s .+ %s" % (QUERY_DELIMITER, QUERY_DELIMITER))
+
+    @property
+    def items(self):
+        if not self.node:
+            return [
+                {
+                    "title": "Unknown node \"%s\"." % self.name,
+                    "valid": False,
+                    "autocomplete": u"Nodes %s " % QUERY_DELIMITER,
+                    "icon": ICON_WARNING
+                }
+            ]
+        if self.node["offline"]:
+            toggle = {
+                "title": "Bring %s online" % self.node["name"],
+                "subtitle": "Mark the node as available for builds again.",
+                "valid": True,
+                "arg": "jenky_action:enable_node:%s" % self.node["name"],
+                "variables": {"jenky_action": "enable_node", "jenky_value": self.node["name"]},
+                "icon": ICON_NETWORK
+            }
+        else:
+            toggle = {
+                "title": "Take %s offline" % self.node["name"],
+                "subtitle": "Running builds finish, but no new builds will start.",
+                "valid": True,
+                "arg": "jenky_action:disable_node:%s" % self.node["name"],
+                "variables": {"jenky_action": "disable_node", "jenky_value": self.node["name"]},
+                "icon": ICON_WARNING
+            }
+        return [
+            {
+                "title": "Open %s" % self.node["name"],
+                "subtitle": node_subtitle(self.node),
+                "valid": True,
+                "arg": self.node["url"],
+                "icon": ICON_WEB
+            },
+            toggle
+        ]
+
+    def __init__(self, wf, query):
+        super(NodeActionsMenu, self).__init__(wf, query)
+        self.name = query.split(QUERY_DELIMITER)[1].strip()
+        self.node = None
+        for node in wf.cached_data("nodes", max_age=0) or []:
+            if node["name"] == self.name:
+                self.node = node
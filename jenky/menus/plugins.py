@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import re
+
+from workflow import ICON_CLOCK, ICON_SYNC
+
+from jenky import FETCH_RERUN, QUERY_DELIMITER
+from jenky.menus.base import BaseMenu
+from jenky.plugins import PLUGINS_MAX_AGE, PluginInventory, search_key_for_plugin
+from jenky.server import refresh_in_background
+
+class PluginsMenu(BaseMenu):
+
+    query_match = re.compile(u"^Plugins %s" % QUERY_DELIMITER)
+
+    @property
+    def items(self):
+        if self.inventory.plugins is None:
+            yield {
+                "title": "Fetching plugin inventory...",
+                "subtitle": "Reopen this menu in a moment.",
+                "valid": False,
+                "icon": ICON_CLOCK
+            }
+            return
+        for plugin in self.plugins:
+            state = plugin.get("active") and "active" or "inactive"
+            if plugin.get("hasUpdate"):
+                state += ", update available"
+            yield {
+                "title": plugin.get("longName") or plugin.get("shortName"),
+                "subtitle": "%s %s (%s)" % (plugin.get("shortName"), plugin.get("version"), state),
+                "valid": bool(plugin.get("url")),
+                "arg": plugin.get("url"),
+                "uid": "plugin-%s" % plugin.get("shortName"),
+                "icon": plugin.get("hasUpdate") and ICON_SYNC or None
+            }
+        if not self.plugins:
+            yield {
+                "title": "No plugins found matching \"%s\"." % self.search,
+                "valid": False
+            }
+
+    @property
+    def result_count(self):
+        return len(self.plugins)
+
+    def __init__(self, wf, query):
+        super(PluginsMenu, self).__init__(wf, query)
+        self.search = query.split(QUERY_DELIMITER)[1].strip()
+        self.inventory = PluginInventory(wf)
+        if self.inventory.plugins is None:
+            wf.rerun = FETCH_RERUN
+        if not wf.cached_data_fresh("plugins", PLUGINS_MAX_AGE):
+            refresh_in_background(wf, "plugins")
+
+        self.plugins = self.inventory.plugins or []
+        if self.plugins and self.search:
+            exact = self.inventory.get(self.search)
+            self.plugins = wf.filter(self.search, self.plugins,
+                                     key=search_key_for_plugin, min_score=20)
+            if exact:
+                self.plugins = [exact] + [p for p in self.plugins if p is not exact]
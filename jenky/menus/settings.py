@@ -4,6 +4,11 @@ import re
 from jenky import QUERY_DELIMITER
 from jenky.menus.base import BaseMenu
 
+
+def setting_value(query):
+    return query.split(QUERY_DELIMITER)[1].strip()
+
+
 class SettingsMenu(BaseMenu):
 
     query_match = re.compile("")
@@ -47,14 +52,14 @@ class UsernameMenu(BaseMenu):
                 "title": "Set your Jenkins username.",
                 "subtitle": "Whatever you normally use to sign into your Jenkins instance.",
                 "valid": True,
-                "arg": self.output
+                "arg": self.output,
+                "variables": {"jenky_setting": "username", "jenky_value": setting_value(self.query)}
             }
         ]
 
     @property
     def output(self):
-        username = self.query.split(QUERY_DELIMITER)[1].strip()
-        return "jenky_setting:username:%s" % username
+        return "jenky_setting:username:%s" % setting_value(self.query)
 
 
 class APIKeyMenu(BaseMenu):
@@ -68,14 +73,14 @@ class APIKeyMenu(BaseMenu):
                 "title": "Set your Jenkins API Key.",
                 "subtitle": "You can find this on your personal 'Configure' page in Jenkins (click your name in the top right).",
                 "valid": True,
-                "arg": self.output
+                "arg": self.output,
+                "variables": {"jenky_setting": "api_key", "jenky_value": setting_value(self.query)}
             }
         ]
 
     @property
     def output(self):
-        api_key = self.query.split(QUERY_DELIMITER)[1].strip()
-        return "jenky_setting:api_key:%s" % api_key
+        return "jenky_setting:api_key:%s" % setting_value(self.query)
 
 
 class HostnameMenu(BaseMenu):
@@ -89,11 +94,11 @@ class HostnameMenu(BaseMenu):
                 "title": "Set your Jenkins hostname.",
                 "subtitle": "The URL of your jenkins instance, e.g. 'https://my-jenkins.awesome.com' (no trailing slash).",
                 "valid": True,
-                "arg": self.output
+                "arg": self.output,
+                "variables": {"jenky_setting": "hostname", "jenky_value": setting_value(self.query)}
             }
         ]
 
     @property
     def output(self):
-        hostname = self.query.split(QUERY_DELIMITER)[1].strip()
-        return "jenky_setting:hostname:%s" % hostname
\ No newline at end of file
+        return "jenky_setting:hostname:%s" % setting_value(self.query)
\ No newline at end of file
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import atexit
+import json
+import time
+
+from workflow.workflow import LockFile, atomic_writer
+
+# Lives in the cache dir, so it shows up (and can be cleared) in the Cache menu
+METRICS_FILE = "request_metrics.json"
+# Recent requests per endpoint kept for percentiles
+METRICS_WINDOW = 200
+
+
+def percentile(values, fraction):
+    # Nearest rank
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def is_error(status):
+    # A 404 is a normal answer to e.g. "does this job exist?"
+    return status is None or (status >= 400 and status != 404)
+
+
+class RequestMetrics(object):
+    """Rolling per-endpoint request statistics, shared by all Jenky processes.
+
+    Requests are collected in memory and merged into the metrics file when
+    the process exits.
+    """
+
+    def __init__(self, wf):
+        self.path = wf.cachefile(METRICS_FILE)
+        self.pending = []
+        self.registered = False
+
+    def record(self, template, url, status, size, seconds):
+        if not self.registered:
+            atexit.register(self.save)
+            self.registered = True
+        self.pending.append((template, status, size, seconds))
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as file_obj:
+                return json.load(file_obj)
+        except (IOError, ValueError):
+            return {}
+
+    def save(self):
+        if not self.pending:
+            return
+        with LockFile(self.path):
+            metrics = self.load()
+            for template, status, size, seconds in self.pending:
+                endpoint = metrics.setdefault(template, {
+                    "count": 0,
+                    "errors": 0,
+                    "bytes": 0,
+                    "seconds": 0.0,
+                    "samples": []
+                })
+                endpoint["count"] += 1
+                endpoint["errors"] += is_error(status)
+                endpoint["bytes"] += size
+                endpoint["seconds"] += seconds
+                endpoint["last"] = time.time()
+                endpoint["samples"] = (endpoint["samples"] + [[seconds, size]])[-METRICS_WINDOW:]
+            with atomic_writer(self.path, "wb") as file_obj:
+                json.dump(metrics, file_obj)
+        self.pending = []
+
+    def reset(self):
+        self.pending = []
+        with LockFile(self.path):
+            with atomic_writer(self.path, "wb") as file_obj:
+                json.dump({}, file_obj)
+
+    def summary(self):
+        """Per-endpoint stats, the endpoint with most time spent first."""
+        endpoints = []
+        for template, endpoint in self.load().items():
+            latencies = [s[0] for s in endpoint["samples"]]
+            sizes = [s[1] for s in endpoint["samples"]]
+            endpoints.append({
+                "template": template,
+                "count": endpoint["count"],
+                "errors": endpoint["errors"],
+                "bytes": endpoint["bytes"],
+                "seconds": endpoint["seconds"],
+                "p50": percentile(latencies, 0.5),
+                "p95": percentile(latencies, 0.95),
+                "size_p50": percentile(sizes, 0.5),
+                "size_p95": percentile(sizes, 0.95)
+            })
+        return sorted(endpoints, key=lambda e: e["seconds"], reverse=True)
+
+
+_metrics = {}
+
+
+def get_metrics(wf):
+    if wf not in _metrics:
+        _metrics[wf] = RequestMetrics(wf)
+    return _metrics[wf]
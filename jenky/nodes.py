@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from six.moves.urllib.parse import quote
+
+NODES_MAX_AGE = 300
+
+NODE_TREE = ("computer[displayName,offline,temporarilyOffline,numExecutors,"
+             "assignedLabels[name]]")
+
+
+def node_url(server, name):
+    # The master's node page lives under a reserved name
+    if name == "master":
+        name = "(master)"
+    return "%scomputer/%s/" % (server, quote(name.encode("utf-8")))
+
+
+def build_node_index(server, computers):
+    nodes = []
+    for computer in computers.get("computer", []):
+        name = computer.get("displayName")
+        if not name:
+            continue
+        labels = [l.get("name") for l in computer.get("assignedLabels") or []]
+        nodes.append({
+            "name": name,
+            "labels": [l for l in labels if l and l != name],
+            "offline": computer.get("offline", False),
+            "temporarily_offline": computer.get("temporarilyOffline", False),
+            "executors": computer.get("numExecutors", 0),
+            "url": node_url(server, name)
+        })
+    nodes.sort(key=lambda n: n["name"].lower())
+    return nodes
+
+
+def set_node_offline(nodes, name, offline):
+    # Patch the cached index after a toggle instead of re-polling Jenkins
+    for node in nodes:
+        if node["name"] == name:
+            node["offline"] = offline
+            node["temporarily_offline"] = offline
+    return nodes
+
+
+def search_key_for_node(node):
+    return u" ".join([node["name"]] + node["labels"])
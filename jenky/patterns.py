@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+import fnmatch
+import re
+import sre_constants
+import sre_parse
+import time
+from collections import OrderedDict
+from itertools import izip
+
+# Compiled patterns kept per process, the least recently used goes first
+PATTERN_CACHE_SIZE = 32
+# A pattern search stops, with the matches found so far, after this long
+PATTERN_TIME_BUDGET = 0.5
+# Unbounded repeats allowed in one pattern: every one more multiplies the
+# ways a name can be split between them, .*a.*a.*a.*y already takes over a
+# second on a 100 character name
+MAX_UNBOUNDED_REPEATS = 3
+
+REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+BEGINNINGS = [(sre_constants.AT, sre_constants.AT_BEGINNING),
+              (sre_constants.AT, sre_constants.AT_BEGINNING_STRING)]
+
+
+class PatternError(Exception):
+    pass
+
+
+def set_chars(members):
+    # Characters a [...] set matches, None for classes and negations
+    chars = set()
+    for op, av in members:
+        if op == sre_constants.LITERAL:
+            chars.add(unichr(av).lower())
+        elif op == sre_constants.RANGE and av[1] - av[0] < 256:
+            chars.update(unichr(c).lower() for c in range(av[0], av[1] + 1))
+        else:
+            return None
+    return chars
+
+
+def first_chars(items):
+    """Lowercase characters a match of ``items`` can start with (None if
+    that could be any character) and whether it can match nothing at all."""
+    chars = set()
+    for op, av in items:
+        if op in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            continue  # Zero width
+        if op == sre_constants.LITERAL:
+            return chars | set([unichr(av).lower()]), False
+        if op == sre_constants.IN:
+            found = set_chars(av)
+            return (None if found is None else chars | found), False
+        if op in REPEATS:
+            found, empty = first_chars(av[2])
+            empty = empty or av[0] == 0
+        elif op == sre_constants.SUBPATTERN:
+            found, empty = first_chars(av[-1])
+        elif op == sre_constants.BRANCH:
+            alternatives = [first_chars(branch) for branch in av[1]]
+            found = set()
+            for alternative, _ in alternatives:
+                if alternative is None:
+                    found = None
+                    break
+                found |= alternative
+            empty = any(e for _, e in alternatives)
+        else:
+            return None, False
+        if found is None:
+            return None, False
+        chars |= found
+        if not empty:
+            return chars, False
+    return chars, True
+
+
+def check_alternatives(branches):
+    """Refuse alternatives that can match the same text, e.g. (a|a) or
+    (\\w|\\d): under a repeat every way of splitting a name between them
+    gets tried."""
+    seen = set()
+    for chars, empty in (first_chars(branch) for branch in branches):
+        if chars is None or empty or seen & chars:
+            raise PatternError("repeated alternatives that can match the same text, "
+                               "like (a|ab)*, can take forever, rewrite the pattern "
+                               "without them")
+        seen |= chars
+
+
+def unbounded_repeats(items):
+    """Most unbounded repeats (.*, \\d+...) one match of ``items`` goes through."""
+    count = 0
+    for op, av in items:
+        if op in REPEATS:
+            count += (av[1] == sre_constants.MAXREPEAT) + unbounded_repeats(av[2])
+        elif op == sre_constants.SUBPATTERN:
+            count += unbounded_repeats(av[-1])
+        elif op == sre_constants.BRANCH:
+            count += max(unbounded_repeats(branch) for branch in av[1])
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            count += unbounded_repeats(av[1])
+    return count
+
+
+def check_pattern(parsed, repeated=False, counted=False):
+    """Refuse patterns that can backtrack exponentially, or polynomially to a
+    high degree, on a single name and hang Alfred: a repeat or overlapping
+    alternatives inside an unbounded repeat, e.g. (a+)+, (\\w+\\s?)* or (a|a)*,
+    an unbounded repeat or overlapping alternatives inside a counted one,
+    e.g. (.*a){12} or (a|a){30}, more than MAX_UNBOUNDED_REPEATS unbounded
+    repeats and backreferences.  Python's re can't be interrupted, so this
+    is checked before matching."""
+    if not (repeated or counted) and unbounded_repeats(parsed) > MAX_UNBOUNDED_REPEATS:
+        raise PatternError("more than %d repeats like .* or \\d+ can take forever, "
+                           "use fewer or bound them, like \\d{1,4}" % MAX_UNBOUNDED_REPEATS)
+    for op, av in parsed:
+        if op in REPEATS:
+            low, high, sub = av
+            unbounded = high == sre_constants.MAXREPEAT
+            if repeated and high > 1:
+                raise PatternError("nested repeats like (a+)+ can take forever, "
+                                   "rewrite the pattern without them")
+            if counted and unbounded:
+                raise PatternError("repeats inside counted repeats, like (.*a){12}, "
+                                   "can take forever, rewrite the pattern without them")
+            check_pattern(sub, repeated or unbounded, counted or (high > 1 and not unbounded))
+        elif op == sre_constants.SUBPATTERN:
+            check_pattern(av[-1], repeated, counted)
+        elif op == sre_constants.BRANCH:
+            if repeated or counted:
+                check_alternatives(av[1])
+            for branch in av[1]:
+                check_pattern(branch, repeated, counted)
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            check_pattern(av[1], repeated, counted)
+        elif op in (sre_constants.GROUPREF, sre_constants.GROUPREF_EXISTS):
+            raise PatternError("backreferences are not supported")
+
+
+def literals(parsed, anchored):
+    """Literal text a matching name must start with ("" if the pattern is not
+    anchored) and the longest literal text it must contain, in lowercase."""
+    items = list(parsed)
+    if items[:1] and items[0] in BEGINNINGS:
+        items, anchored = items[1:], True
+    runs = [[]]
+    for op, av in items:
+        if op == sre_constants.LITERAL:
+            runs[-1].append(unichr(av))
+        else:
+            runs.append([])
+    runs = [u"".join(run).lower() for run in runs]
+    return anchored and runs[0] or u"", max(runs, key=len)
+
+
+class JobPattern(object):
+    """A re: or glob: pattern over job names, case-insensitive.
+
+    glob: patterns match whole names, re: patterns anywhere in a name.
+    """
+
+    def __init__(self, kind, source):
+        regex = fnmatch.translate(source) if kind == "glob" else source
+        flags = re.IGNORECASE | re.UNICODE
+        try:
+            parsed = sre_parse.parse(regex, flags)
+            check_pattern(parsed)
+            compiled = re.compile(regex, flags)
+        except (re.error, OverflowError) as err:
+            raise PatternError(str(err))
+        self.kind = kind
+        self.source = source
+        self.test = kind == "glob" and compiled.match or compiled.search
+        self.prefix, self.literal = literals(parsed, kind == "glob")
+
+    def candidates(self, index):
+        # (lowercase name, position) pairs that can match at all
+        names, order = index.names, index.order
+        if self.prefix:
+            i = index.first(self.prefix)
+            end = i
+            while end < len(names) and names[end].startswith(self.prefix):
+                end += 1
+            return izip(names[i:end], order[i:end])
+        pairs = izip(names, order)
+        if self.literal:
+            return ((name, i) for name, i in pairs if self.literal in name)
+        return pairs
+
+    def select(self, index, positions=None, budget=PATTERN_TIME_BUDGET):
+        """Positions of the jobs whose names match, out of ``positions`` if
+        given, and whether all names were tested within ``budget``.  A match
+        can't be stopped, check_pattern keeps a single one short."""
+        deadline = time.time() + budget
+        found = set()
+        for name, i in self.candidates(index):
+            if time.time() > deadline:
+                return found, False
+            if (positions is None or i in positions) and self.test(name):
+                found.add(i)
+        return found, True
+
+
+_patterns = OrderedDict()
+
+
+def compile_pattern(kind, source):
+    key = (kind, source)
+    if key in _patterns:
+        _patterns[key] = _patterns.pop(key)
+    else:
+        _patterns[key] = JobPattern(kind, source)
+        if len(_patterns) > PATTERN_CACHE_SIZE:
+            _patterns.popitem(last=False)
+    return _patterns[key]
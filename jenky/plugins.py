@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+PLUGINS_MAX_AGE = 3600
+
+PLUGIN_TREE = "plugins[shortName,longName,version,active,enabled,hasUpdate,url]"
+
+
+def fetch_plugins(jenkins):
+    plugins = jenkins.get_plugins_info(tree=PLUGIN_TREE)
+    plugins.sort(key=lambda p: (p.get("longName") or p.get("shortName", "")).lower())
+    # Index by both names, like Jenkins.get_plugin_info matches either
+    names = {}
+    for i, plugin in enumerate(plugins):
+        for key in ("shortName", "longName"):
+            if plugin.get(key):
+                names[plugin[key]] = i
+    return {"plugins": plugins, "names": names}
+
+
+class PluginInventory(object):
+
+    def __init__(self, wf):
+        data = wf.cached_data("plugins", max_age=0) or {}
+        self.plugins = data.get("plugins")
+        self.names = data.get("names", {})
+
+    def get(self, name):
+        i = self.names.get(name)
+        if i is None:
+            return None
+        return self.plugins[i]
+
+
+def search_key_for_plugin(plugin):
+    return u"%s %s" % (plugin.get("shortName", ""), plugin.get("longName", ""))
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from workflow.background import run_in_background
+
+from jenkins import Jenkins
+
+from jenky.credentials import get_credentials
+from jenky.metrics import get_metrics
+
+
+class TracedJenkins(Jenkins):
+    # Every request to the server gets its own span in the workflow trace
+    # and is counted in the request metrics
+
+    def __init__(self, wf, *args, **kwargs):
+        super(TracedJenkins, self).__init__(*args, **kwargs)
+        self.wf = wf
+        self.request_hook = get_metrics(wf).record
+
+    def jenkins_open(self, req, *args, **kwargs):
+        with self.wf.span("jenkins_open", url=req.get_full_url()):
+            return super(TracedJenkins, self).jenkins_open(req, *args, **kwargs)
+
+
+def get_jenkins(wf):
+    username = wf.settings.get("jenkins_username", None)
+    hostname = wf.settings.get("jenkins_hostname", None)
+    api_key = get_credentials(wf).get("jenkins_api_key")
+    return TracedJenkins(wf, hostname, username, api_key)
+
+
+def refresh_in_background(wf, task):
+    # refresh.py re-populates the named cache in a detached process, so
+    # menus can render whatever is cached right now without waiting on the
+    # network.  run_in_background is a no-op if the task is already running.
+    cmd = ["/usr/bin/python", wf.workflowfile("refresh.py"), task]
+    run_in_background("jenky-refresh-%s" % task, cmd)
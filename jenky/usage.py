@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import codecs
+import time
+
+from workflow.workflow import LockFile, atomic_writer
+
+# Jobs opened through Jenky, one "timestamp<TAB>job name" line each
+USAGE_LOG = "usage.log"
+# Older uses have decayed to next to nothing anyway
+USAGE_LOG_SIZE = 1000
+# A use counts half as much after a week
+FRECENCY_HALF_LIFE = 7 * 86400.0
+# Score added to a match per (decayed) use, and the most it gets
+FRECENCY_BOOST = 10
+FRECENCY_MAX_BOOST = 100
+
+
+def decay(seconds):
+    return 0.5 ** (seconds / FRECENCY_HALF_LIFE)
+
+
+def frecency(uses, now):
+    table = {}
+    for timestamp, name in uses:
+        table[name] = table.get(name, 0) + decay(now - timestamp)
+    return table
+
+
+class UsageLog(object):
+    """Jobs opened through Jenky, and their frecency.
+
+    The frecency table is rebuilt whenever a use is recorded, so a search
+    only has to load it.
+    """
+
+    def __init__(self, wf):
+        self.wf = wf
+        self.path = wf.datafile(USAGE_LOG)
+
+    def read(self):
+        uses = []
+        try:
+            with codecs.open(self.path, "rb", "utf-8") as file_obj:
+                for line in file_obj:
+                    timestamp, _, name = line.rstrip("\n").partition("\t")
+                    uses.append((float(timestamp), name))
+        except IOError:
+            pass
+        return uses
+
+    def record(self, name):
+        now = time.time()
+        with LockFile(self.path):
+            uses = (self.read() + [(now, name)])[-USAGE_LOG_SIZE:]
+            with atomic_writer(self.path, "wb") as file_obj:
+                for timestamp, job in uses:
+                    file_obj.write((u"%f\t%s\n" % (timestamp, job)).encode("utf-8"))
+            self.wf.store_data("frecency", {"updated": now, "table": frecency(uses, now)})
+
+    def boosts(self):
+        """Score to add to each job when it matches a search."""
+        data = self.wf.stored_data("frecency")
+        if not data:
+            return {}
+        factor = decay(time.time() - data["updated"]) * FRECENCY_BOOST
+        return dict((name, min(score * factor, FRECENCY_MAX_BOOST))
+                    for name, score in data["table"].items())
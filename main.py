@@ -2,8 +2,10 @@
 import argparse
 import sys
 
-from workflow import Workflow, ICON_WARNING, PasswordNotFound
+from workflow import Workflow, ICON_WARNING
 
+from jenky import CACHE_SERIALIZER
+from jenky.credentials import get_credentials
 from jenky.menus import available_menus
 from jenky.menus.initial import InitialMenu
 from jenky.menus.unconfigured import UnconfiguredMenu
@@ -14,10 +16,7 @@ log = None
 def jenky_configured(wf):
     username = wf.settings.get("jenkins_username", None)
     hostname = wf.settings.get("jenkins_hostname", None)
-    try:
-        api_key = wf.get_password("jenkins_api_key")
-    except PasswordNotFound:
-        api_key = None
+    api_key = get_credentials(wf).get("jenkins_api_key")
     log.debug("Username is %s" % username)
     log.debug("API Key %s" % (api_key and "exists" or "does not exist"))
     log.debug("Hostname is %s" % hostname)
@@ -59,5 +58,6 @@ def main(wf):
 
 if __name__ == '__main__':
     wf = Workflow()
+    wf.cache_serializer = CACHE_SERIALIZER
     log = wf.logger
     sys.exit(wf.run(main))
\ No newline at end of file
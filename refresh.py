@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import argparse
+import sys
+
+from workflow import Workflow
+
+from jenky import CACHE_SERIALIZER
+from jenky.cache import CacheManager
+from jenky.config_index import ConfigIndex
+from jenky.configs import ConfigCache
+from jenky.dashboard import COMPUTER_TREE, QUEUE_TREE, build_dashboard
+from jenky.nodes import NODE_TREE, build_node_index
+from jenky.plugins import fetch_plugins
+from jenky.server import get_jenkins
+
+log = None
+
+
+def refresh_dashboard(wf):
+    jenkins = get_jenkins(wf)
+    computers = jenkins.get_computer_info(tree=COMPUTER_TREE)
+    queue = jenkins.get_queue_info(tree=QUEUE_TREE)
+    wf.cache_data("dashboard", build_dashboard(computers, queue))
+    wf.cache_data("nodes", build_node_index(jenkins.server, computers))
+
+
+def refresh_nodes(wf):
+    jenkins = get_jenkins(wf)
+    computers = jenkins.get_computer_info(tree=NODE_TREE)
+    wf.cache_data("nodes", build_node_index(jenkins.server, computers))
+
+
+def refresh_configs(wf):
+    configs = ConfigCache(wf)
+    changed = configs.sync(get_jenkins(wf))
+    index = ConfigIndex(wf)
+    if not index.count:
+        index.rebuild(configs)
+    elif changed:
+        index.update(configs, changed)
+
+
+def refresh_plugins(wf):
+    wf.cache_data("plugins", fetch_plugins(get_jenkins(wf)))
+
+
+tasks = {
+    "configs": refresh_configs,
+    "dashboard": refresh_dashboard,
+    "nodes": refresh_nodes,
+    "plugins": refresh_plugins
+}
+
+
+def main(wf):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("task", choices=sorted(tasks.keys()))
+    args = parser.parse_args(wf.args)
+
+    log.debug("Refreshing %s..." % args.task)
+    tasks[args.task](wf)
+    # Refreshes are what grow the cache, so keep it in budget here
+    evicted = CacheManager(wf).enforce()
+    if evicted:
+        log.debug("Evicted from cache: %s" % ", ".join(evicted))
+    return 0
+
+
+if __name__ == '__main__':
+    wf = Workflow()
+    wf.cache_serializer = CACHE_SERIALIZER
+    log = wf.logger
+    sys.exit(wf.run(main))
@@ -4,6 +4,7 @@ import sys
 
 from workflow import Workflow, ICON_WARNING, PasswordNotFound
 
+from jenky import CACHE_SERIALIZER
 from jenky.menus import settings_menus
 from jenky.menus.settings import SettingsMenu
 
@@ -38,5 +39,6 @@ def main(wf):
 
 if __name__ == '__main__':
     wf = Workflow()
+    wf.cache_serializer = CACHE_SERIALIZER
     log = wf.logger
     sys.exit(wf.run(main))
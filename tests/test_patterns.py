@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import time
+import unittest
+
+from jenky.job_query import JobFieldIndex
+from jenky.patterns import PATTERN_TIME_BUDGET, JobPattern, PatternError
+
+# Each of these ran for more than 10 seconds on a single 31 character name
+SLOW_PATTERNS = [
+    "(.*a){12}y",
+    ".*a" * 12 + ".*y",
+    "(a|a){30}y",
+    "(a+)+y",
+    "(a|a)*y"
+]
+SLOW_NAME = u"a" * 31
+
+
+class CheckPatternTest(unittest.TestCase):
+
+    def test_slow_patterns_are_refused(self):
+        for source in SLOW_PATTERNS:
+            self.assertRaises(PatternError, JobPattern, "re", source)
+
+    def test_usual_patterns_are_accepted(self):
+        for kind, source in [("re", r"^release-\d+"), ("re", r"api-\d{1,4}\.\d+"),
+                             ("re", r"^(deploy|release)-.*-prod$"), ("glob", "*-nightly"),
+                             ("glob", "payments-*-*")]:
+            JobPattern(kind, source)
+
+    def test_select_stays_within_budget(self):
+        jobs = [{"name": SLOW_NAME + str(i)} for i in range(2000)]
+        index = JobFieldIndex.build(jobs)
+        pattern = JobPattern("re", ".*a.*a.*y")
+        start = time.time()
+        found, complete = pattern.select(index)
+        self.assertLess(time.time() - start, PATTERN_TIME_BUDGET + 0.5)
+        self.assertEqual(found, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
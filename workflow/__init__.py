@@ -66,6 +66,7 @@ from .workflow import (
     MATCH_INITIALS_STARTSWITH,
     MATCH_STARTSWITH,
     MATCH_SUBSTRING,
+    MATCH_TYPO,
 )
 
 __all__ = [
@@ -105,4 +106,5 @@ __all__ = [
     'MATCH_INITIALS_STARTSWITH',
     'MATCH_STARTSWITH',
     'MATCH_SUBSTRING',
+    'MATCH_TYPO',
 ]
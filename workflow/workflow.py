@@ -18,6 +18,9 @@ up your Python script to best utilise the :class:`Workflow` object.
 from __future__ import print_function, unicode_literals
 
 import binascii
+from contextlib import contextmanager
+import errno
+import fcntl
 import os
 import sys
 import string
@@ -28,14 +31,24 @@ import unicodedata
 import shutil
 import json
 import cPickle
+import marshal
 import pickle
 import time
+import zlib
 import logging
 import logging.handlers
 try:
     import xml.etree.cElementTree as ET
 except ImportError:  # pragma: no cover
     import xml.etree.ElementTree as ET
+try:
+    from cStringIO import StringIO
+except ImportError:  # pragma: no cover
+    from StringIO import StringIO
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 
 #: Sentinel for properties that haven't been set yet (that might
@@ -398,6 +411,7 @@ DUMB_PUNCTUATION = {
 # Anchor characters in a name
 #: Characters that indicate the beginning of a "word" in CamelCase
 INITIALS = string.ascii_uppercase + string.digits
+INITIALS_LOWER = string.ascii_lowercase + string.digits
 
 #: Split on non-letters, numbers
 split_on_delimiters = re.compile('[^a-zA-Z0-9]').split
@@ -422,6 +436,20 @@ MATCH_SUBSTRING = 32
 MATCH_ALLCHARS = 64
 #: Combination of all other ``MATCH_*`` constants
 MATCH_ALL = 127
+#: Match items with an atom ``query`` is a misspelling of. Not part of
+#: :const:`MATCH_ALL`, see :meth:`Workflow.filter`
+MATCH_TYPO = 128
+
+#: A word at least ``TYPO_LENGTHS[n - 1]`` characters long may match
+#: with ``n`` typos
+TYPO_LENGTHS = (4, 8)
+#: Score of a word matched with one typo. Every further typo costs 10.
+TYPO_SCORE = 50.0
+
+#: :meth:`Workflow.filter` matches lists at least this long in bulk
+BULK_FILTER_MIN = 100
+#: Non-ASCII character
+NON_ASCII = re.compile('[^\x00-\x7f]')
 
 
 ####################################################################
@@ -432,6 +460,31 @@ MATCH_ALL = 127
 DEFAULT_UPDATE_FREQUENCY = 1
 
 
+####################################################################
+# Used by `Workflow.cache_data`
+####################################################################
+
+#: Header written before zlib-compressed cache files. Serialized data
+#: never starts with a NUL byte, so uncompressed caches are unaffected.
+COMPRESSED_CACHE_MAGIC = b'\x00awz\x01'
+
+#: Serialized caches at least this large are compressed when their
+#: compression mode is ``'auto'``
+COMPRESS_CACHE_THRESHOLD = 64 * 1024
+
+#: zlib level for compressed caches. Decompression speed barely depends
+#: on it, so favour fast writes.
+COMPRESS_CACHE_LEVEL = 1
+
+#: Cache accesses are only recorded (in atime, for LRU eviction) if the
+#: last one was longer ago than this many seconds, so that loading a
+#: cache doesn't write to disk every time
+CACHE_ACCESS_RESOLUTION = 60 * 60
+
+#: Size of the compressed chunks read when loading a compressed cache
+DECOMPRESS_CHUNK_SIZE = 64 * 1024
+
+
 ####################################################################
 # Keychain access errors
 ####################################################################
@@ -481,10 +534,354 @@ def isascii(text):
     return True
 
 
+def edit_distance(a, b):
+    """Number of typos that turn ``a`` into ``b``
+
+    A typo is inserting, deleting or replacing a character or swapping
+    two adjacent characters (optimal string alignment distance).
+
+    :param a: first string
+    :type a: ``unicode``
+    :param b: second string
+    :type b: ``unicode``
+    :returns: edit distance between ``a`` and ``b``
+    :rtype: ``int``
+    """
+
+    before = previous = None
+    row = range(len(b) + 1)
+    for i in range(1, len(a) + 1):
+        previous, row = row, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            row[j] = min(previous[j] + 1, row[j - 1] + 1,
+                         previous[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and
+                    a[i - 2] == b[j - 1]):
+                row[j] = min(row[j], before[j - 2] + 1)
+        before = previous
+    return row[-1]
+
+
+def file_stamp(stat):
+    """Return a value that changes whenever a file is rewritten.
+
+    :param stat: result of :func:`os.stat` or :func:`os.fstat`
+    :returns: ``(inode, mtime, size)``
+    :rtype: ``tuple``
+
+    """
+
+    # Every atomic write renames a new file into place, so the inode
+    # changes even when mtime resolution (1s on HFS+) hides the write
+    return (stat.st_ino, stat.st_mtime, stat.st_size)
+
+
+@contextmanager
+def atomic_writer(file_path, mode='wb'):
+    """Open a temporary file for writing that replaces ``file_path``
+    when the ``with`` block exits.
+
+    The data are flushed and :func:`os.fsync`-ed before the temporary
+    file is renamed over ``file_path``, so readers see either the old
+    file or the complete new one, never a truncated file, even if the
+    writer crashes. If the block raises an exception, ``file_path`` is
+    left untouched.
+
+    :param file_path: path of the file to (re)write
+    :type file_path: ``unicode``
+    :param mode: mode to open the temporary file in
+    :type mode: ``unicode``
+
+    """
+
+    temp_path = '{0}.{1}.tmp'.format(file_path, os.getpid())
+    try:
+        with open(temp_path, mode) as file_obj:
+            yield file_obj
+            file_obj.flush()
+            os.fsync(file_obj.fileno())
+        os.rename(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+
 ####################################################################
 # Implementation classes
 ####################################################################
 
+class LockFile(object):
+    """Advisory, inter-process lock protecting ``protected_path``.
+
+    Uses :func:`fcntl.flock` on ``<protected_path>.lock``, so the lock is
+    released by the OS if the holding process dies. The lock file itself
+    is left in place: deleting it would let two processes lock different
+    files for the same path.
+
+    Can be used as a context manager, in which case it blocks until the
+    lock is acquired::
+
+        with LockFile(path):
+            regenerate(path)
+
+    :param protected_path: path of the file the lock protects
+    :type protected_path: ``unicode``
+
+    """
+
+    def __init__(self, protected_path):
+        self.lockfile = protected_path + '.lock'
+        self._fd = None
+
+    @property
+    def locked(self):
+        """``True`` if this object holds the lock"""
+        return self._fd is not None
+
+    def acquire(self, blocking=True, timeout=None, delay=0.05):
+        """Acquire the lock.
+
+        :param blocking: wait for the lock if another process holds it
+        :type blocking: ``Boolean``
+        :param timeout: if ``blocking``, give up after this many seconds.
+            ``None`` means wait forever.
+        :type timeout: ``float``
+        :param delay: seconds between attempts when waiting with a
+            ``timeout``
+        :type delay: ``float``
+        :returns: ``True`` if the lock was acquired, else ``False``
+
+        """
+
+        if self._fd is not None:
+            return True
+        fd = os.open(self.lockfile, os.O_CREAT | os.O_WRONLY, 0o644)
+        if blocking and timeout is None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            self._fd = fd
+            return True
+
+        # Poll, as :func:`fcntl.flock` itself can't time out
+        start = time.time()
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except IOError as err:
+                if err.errno not in (errno.EAGAIN, errno.EACCES):
+                    os.close(fd)
+                    raise
+                if not blocking or time.time() - start >= timeout:
+                    os.close(fd)
+                    return False
+                time.sleep(delay)
+            else:
+                self._fd = fd
+                return True
+
+    def release(self):
+        """Release the lock if this object holds it"""
+        if self._fd is None:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, typ, value, traceback):
+        self.release()
+
+    def __del__(self):
+        self.release()
+
+
+class ZlibReader(object):
+    """Read-only file-like object that decompresses ``file_obj`` on
+    the fly.
+
+    Compressed data are read in chunks of :const:`DECOMPRESS_CHUNK_SIZE`
+    bytes and only decompressed as far as the caller reads, so the
+    whole compressed file is never held in memory.
+
+    :param file_obj: file positioned at the start of zlib data
+    :type file_obj: ``file`` object
+
+    """
+
+    def __init__(self, file_obj):
+        self._file = file_obj
+        self._decompressor = zlib.decompressobj()
+        self._buffer = b''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size):
+        """Decompress until ``size`` unread bytes are buffered or EOF"""
+        if len(self._buffer) - self._pos >= size >= 0 or self._eof:
+            return
+        # Drop consumed data before growing the buffer
+        chunks = [self._buffer[self._pos:]]
+        available = len(chunks[0])
+        while not self._eof and (size < 0 or available < size):
+            chunk = self._file.read(DECOMPRESS_CHUNK_SIZE)
+            if chunk:
+                chunk = self._decompressor.decompress(chunk)
+            else:
+                chunk = self._decompressor.flush()
+                self._eof = True
+            chunks.append(chunk)
+            available += len(chunk)
+        self._buffer = b''.join(chunks)
+        self._pos = 0
+
+    def read(self, size=-1):
+        """Return up to ``size`` decompressed bytes (all if negative)"""
+        self._fill(size)
+        if size < 0:
+            size = len(self._buffer)
+        data = self._buffer[self._pos:self._pos + size]
+        self._pos += len(data)
+        return data
+
+    def readline(self):
+        """Return decompressed data up to and including the next newline"""
+        while True:
+            i = self._buffer.find(b'\n', self._pos)
+            if i > -1 or self._eof:
+                break
+            self._fill(len(self._buffer) - self._pos + DECOMPRESS_CHUNK_SIZE)
+        end = i + 1 if i > -1 else len(self._buffer)
+        data = self._buffer[self._pos:end]
+        self._pos = end
+        return data
+
+
+class _NullSpan(object):
+    """Do-nothing span returned while tracing is off"""
+
+    @property
+    def args(self):
+        return {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typ, value, traceback):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span(object):
+    """A timed, nestable section of a :class:`Tracer`"""
+
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.tracer._stack.append(self.name)
+        self.start = time.time()
+        return self
+
+    def __exit__(self, typ, value, traceback):
+        end = time.time()
+        path = '/'.join(self.tracer._stack)
+        self.tracer._stack.pop()
+        self.tracer.record(path, self.start, end, **self.args)
+
+
+class Tracer(object):
+    """Times nested spans of a workflow run.
+
+    Each finished span is logged as a ``trace span=<path> ms=<duration>``
+    line, where ``<path>`` is the names of the enclosing spans joined
+    with ``/``, followed by the span's arguments as ``key=value`` pairs.
+
+    If ``chrome_path`` is set, spans are also appended to that file in
+    the Chrome trace-event JSON array format, which can be opened in
+    ``chrome://tracing``. Several runs (and processes) append to the same
+    file.
+
+    You probably want :meth:`Workflow.span` rather than this class.
+
+    :param logger: where to log spans
+    :type logger: :class:`logging.Logger`
+    :param enabled: ``False`` to make :meth:`span` a no-op
+    :type enabled: ``Boolean``
+    :param chrome_path: file to append Chrome trace events to
+    :type chrome_path: ``unicode``
+
+    """
+
+    def __init__(self, logger, enabled=True, chrome_path=None):
+        self.logger = logger
+        self.enabled = enabled
+        self.chrome_path = chrome_path
+        self.events = []
+        self._stack = []
+
+    def span(self, name, **args):
+        """Return a context manager that times the ``with`` block.
+
+        :param name: name of the span
+        :type name: ``unicode``
+        :param **args: extra data to record with the span
+
+        """
+
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def record(self, name, start, end, **args):
+        """Record a span that has already finished.
+
+        :param name: name (or path) of the span
+        :type name: ``unicode``
+        :param start: :func:`time.time` the span started at
+        :type start: ``float``
+        :param end: :func:`time.time` the span ended at
+        :type end: ``float``
+        :param **args: extra data to record with the span
+
+        """
+
+        if not self.enabled:
+            return
+        self.logger.info('trace span=%s ms=%.2f%s', name,
+                         (end - start) * 1000,
+                         ''.join([' %s=%s' % (k, args[k])
+                                  for k in sorted(args)]))
+        if self.chrome_path:
+            self.events.append({
+                'name': name.rsplit('/', 1)[-1], 'cat': 'workflow',
+                'ph': 'X', 'ts': int(start * 1e6),
+                'dur': int((end - start) * 1e6),
+                'pid': os.getpid(), 'tid': os.getpid(), 'args': args})
+
+    def flush(self):
+        """Append recorded events to :attr:`chrome_path`"""
+        if not self.chrome_path or not self.events:
+            return
+        # The trace-event array format allows the closing `]` to be
+        # missing, so runs can simply append
+        lines = [json.dumps(event, default=repr) for event in self.events]
+        data = ',\n'.join(lines) + ',\n'
+        if not os.path.exists(self.chrome_path):
+            data = '[\n' + data
+        with open(self.chrome_path, 'ab') as file_obj:
+            file_obj.write(data)
+        self.events = []
+
+
 class SerializerManager(object):
     """Contains registered serializers.
 
@@ -688,11 +1085,183 @@ class PickleSerializer(object):
         return pickle.dump(obj, file_obj, protocol=-1)
 
 
+class MarshalSerializer(object):
+    """Wrapper around :mod:`marshal`.
+
+    The fastest serializer for data made only of built-in types
+    (``dict``, ``list``, ``unicode``, ``int`` etc.), such as parsed JSON
+    API responses. The format is specific to the Python version, so only
+    use it for data that can be regenerated, i.e. caches.
+
+    """
+
+    @classmethod
+    def load(cls, file_obj):
+        """Load serialized object from open marshal file.
+
+        :param file_obj: file handle
+        :type file_obj: ``file`` object
+        :returns: object loaded from marshal file
+        :rtype: object
+
+        """
+
+        # `marshal.load` only accepts real files
+        return marshal.loads(file_obj.read())
+
+    @classmethod
+    def dump(cls, obj, file_obj):
+        """Serialize object ``obj`` to open marshal file.
+
+        :param obj: Python object to serialize
+        :type obj: built-in types only
+        :param file_obj: file handle
+        :type file_obj: ``file`` object
+
+        """
+
+        return file_obj.write(marshal.dumps(obj, 2))
+
+
+class MsgpackSerializer(object):
+    """Wrapper around :mod:`msgpack`, a compact binary JSON.
+
+    Only registered (as ``msgpack``) if the :mod:`msgpack` package is
+    installed. Like :class:`JSONSerializer`, it only supports JSON-like
+    data.
+
+    """
+
+    @classmethod
+    def load(cls, file_obj):
+        """Load serialized object from open msgpack file.
+
+        :param file_obj: file handle
+        :type file_obj: ``file`` object
+        :returns: object loaded from msgpack file
+        :rtype: object
+
+        """
+
+        data = file_obj.read()
+        try:
+            return msgpack.unpackb(data, raw=False)
+        except TypeError:  # msgpack < 0.5.2
+            return msgpack.unpackb(data, encoding='utf-8')
+
+    @classmethod
+    def dump(cls, obj, file_obj):
+        """Serialize object ``obj`` to open msgpack file.
+
+        :param obj: Python object to serialize
+        :type obj: JSON-serializable data structure
+        :param file_obj: file handle
+        :type file_obj: ``file`` object
+
+        """
+
+        return file_obj.write(msgpack.packb(obj, use_bin_type=True))
+
+
+class CompressedSerializer(object):
+    """zlib-compress the output of another serializer.
+
+    Trades some CPU time for much smaller files, which load faster from
+    a cold disk. A compressed ``cpickle`` variant is registered as
+    ``zcpickle``.
+
+    :param serializer: serializer to compress the output of
+    :type serializer: object with ``load()`` and ``dump()`` methods
+    :param level: zlib compression level, ``1`` (fastest) to ``9``
+    :type level: ``int``
+
+    """
+
+    def __init__(self, serializer, level=1):
+        self.serializer = serializer
+        self.level = level
+
+    def load(self, file_obj):
+        """Load and decompress serialized object from open file.
+
+        :param file_obj: file handle
+        :type file_obj: ``file`` object
+        :returns: object loaded from file
+        :rtype: object
+
+        """
+
+        data = zlib.decompress(file_obj.read())
+        return self.serializer.load(StringIO(data))
+
+    def dump(self, obj, file_obj):
+        """Serialize and compress object ``obj`` to open file.
+
+        :param obj: Python object to serialize
+        :type obj: any object supported by the wrapped serializer
+        :param file_obj: file handle
+        :type file_obj: ``file`` object
+
+        """
+
+        buf = StringIO()
+        self.serializer.dump(obj, buf)
+        return file_obj.write(zlib.compress(buf.getvalue(), self.level))
+
+
 # Set up default manager and register built-in serializers
 manager = SerializerManager()
 manager.register('cpickle', CPickleSerializer)
 manager.register('pickle', PickleSerializer)
 manager.register('json', JSONSerializer)
+manager.register('marshal', MarshalSerializer)
+manager.register('zcpickle', CompressedSerializer(CPickleSerializer))
+if msgpack is not None:
+    manager.register('msgpack', MsgpackSerializer)
+
+
+def _escape_cdata(text):
+    """Escape element text exactly like :mod:`~xml.etree.ElementTree`
+    does when serializing to US-ASCII"""
+    try:
+        if '&' in text:
+            text = text.replace('&', '&amp;')
+        if '<' in text:
+            text = text.replace('<', '&lt;')
+        if '>' in text:
+            text = text.replace('>', '&gt;')
+        return text.encode('us-ascii', 'xmlcharrefreplace')
+    except (TypeError, AttributeError):
+        raise TypeError('cannot serialize %r (type %s)' % (
+                        text, type(text).__name__))
+
+
+def _escape_attrib(text):
+    """Escape attribute value exactly like :mod:`~xml.etree.ElementTree`
+    does when serializing to US-ASCII"""
+    try:
+        if '&' in text:
+            text = text.replace('&', '&amp;')
+        if '<' in text:
+            text = text.replace('<', '&lt;')
+        if '>' in text:
+            text = text.replace('>', '&gt;')
+        if '"' in text:
+            text = text.replace('"', '&quot;')
+        if '\n' in text:
+            text = text.replace('\n', '&#10;')
+        return text.encode('us-ascii', 'xmlcharrefreplace')
+    except (TypeError, AttributeError):
+        raise TypeError('cannot serialize %r (type %s)' % (
+                        text, type(text).__name__))
+
+
+def _xml_element(tag, text, attr=()):
+    """Serialize a childless element. ``attr`` must be sorted."""
+    attr = ''.join([' %s="%s"' % (k, _escape_attrib(v)) for k, v in attr])
+    if text:
+        return '<%s%s>%s</%s>' % (tag, attr, _escape_cdata(text), tag)
+    return '<%s%s />' % (tag, attr)
 
 
 class Item(object):
@@ -705,10 +1274,15 @@ class Item(object):
 
     """
 
+    # Workflows can create thousands of these per run
+    __slots__ = ('title', 'subtitle', 'modifier_subtitles', 'arg',
+                 'autocomplete', 'valid', 'uid', 'icon', 'icontype', 'type',
+                 'largetext', 'copytext', 'variables')
+
     def __init__(self, title, subtitle='', modifier_subtitles=None,
                  arg=None, autocomplete=None, valid=False, uid=None,
                  icon=None, icontype=None, type=None, largetext=None,
-                 copytext=None):
+                 copytext=None, variables=None):
         """Arguments the same as for :meth:`Workflow.add_item`.
 
         """
@@ -725,6 +1299,7 @@ class Item(object):
         self.type = type
         self.largetext = largetext
         self.copytext = copytext
+        self.variables = variables or {}
 
     @property
     def elem(self):
@@ -786,6 +1361,172 @@ class Item(object):
 
         return root
 
+    @property
+    def xml(self):
+        """Serialize feedback item for Alfred without building an
+        :class:`~xml.etree.ElementTree.Element`.
+
+        :returns: ASCII-only XML, identical to
+            ``ElementTree.tostring(item.elem)``
+        :rtype: ``unicode``
+
+        """
+
+        # Attributes in the lexical order ElementTree writes them in
+        attr = []
+        if self.autocomplete is not None:
+            attr.append(('autocomplete', self.autocomplete))
+        if self.type:
+            attr.append(('type', self.type))
+        if self.uid:
+            attr.append(('uid', self.uid))
+        attr.append(('valid', self.valid and 'yes' or 'no'))
+
+        parts = ['<item%s>' % ''.join([' %s="%s"' % (k, _escape_attrib(v))
+                                       for k, v in attr])]
+        parts.append(_xml_element('title', self.title))
+        parts.append(_xml_element('subtitle', self.subtitle))
+        for mod in ('cmd', 'ctrl', 'alt', 'shift', 'fn'):
+            if mod in self.modifier_subtitles:
+                parts.append(_xml_element('subtitle',
+                                          self.modifier_subtitles[mod],
+                                          [('mod', mod)]))
+        if self.arg:
+            parts.append(_xml_element('arg', self.arg))
+        if self.icon:
+            attr = self.icontype and [('type', self.icontype)] or []
+            parts.append(_xml_element('icon', self.icon, attr))
+        if self.largetext:
+            parts.append(_xml_element('text', self.largetext,
+                                      [('type', 'largetype')]))
+        if self.copytext:
+            parts.append(_xml_element('text', self.copytext,
+                                      [('type', 'copy')]))
+        parts.append('</item>')
+        return ''.join(parts)
+
+    @property
+    def obj(self):
+        """Create and return feedback item for Alfred 3+ JSON output.
+
+        Unlike the XML, this includes :attr:`variables`.
+
+        :returns: Alfred JSON item
+        :rtype: ``dict``
+
+        """
+
+        obj = {'title': self.title, 'valid': bool(self.valid)}
+        for name in ('subtitle', 'arg', 'uid', 'type'):
+            value = getattr(self, name)
+            if value:
+                obj[name] = value
+        if self.autocomplete is not None:
+            obj['autocomplete'] = self.autocomplete
+
+        # Modifiers only change the subtitle, as in the XML
+        mods = {}
+        for mod in ('cmd', 'ctrl', 'alt', 'shift', 'fn'):
+            if mod in self.modifier_subtitles:
+                mods[mod] = {'subtitle': self.modifier_subtitles[mod],
+                             'arg': self.arg, 'valid': bool(self.valid)}
+        if mods:
+            obj['mods'] = mods
+
+        if self.icon:
+            obj['icon'] = {'path': self.icon}
+            if self.icontype:
+                obj['icon']['type'] = self.icontype
+
+        text = {}
+        if self.largetext:
+            text['largetype'] = self.largetext
+        if self.copytext:
+            text['copy'] = self.copytext
+        if text:
+            obj['text'] = text
+
+        if self.variables:
+            obj['variables'] = self.variables
+
+        return obj
+
+
+class TypoIndex(object):
+    """Bigram index of the atoms of search keys, for :const:`MATCH_TYPO`
+
+    Finds the atoms within a given :func:`edit_distance` of a word
+    without comparing the word to every atom: a typo changes at most
+    three bigrams, so only atoms sharing enough bigrams with the word
+    are compared.
+
+    Create one with :meth:`Workflow.typo_index`. :attr:`grams` only
+    consists of dicts, lists and strings, so an index can be saved with
+    :meth:`Workflow.cache_data` and restored with ``TypoIndex(grams)``.
+
+    :param grams: :attr:`grams` of a previously built index
+    :type grams: ``dict``
+
+    """
+
+    def __init__(self, grams=None):
+        """Create new :class:`TypoIndex` object."""
+        #: ``{bigram: [atom, ...]}``
+        self.grams = grams or {}
+
+    @staticmethod
+    def bigrams(text):
+        """Bigrams of ``text``, including its first and last character
+
+        :param text: atom or word
+        :type text: ``unicode``
+        :returns: distinct bigrams
+        :rtype: ``set``
+
+        """
+
+        text = '^{0}$'.format(text)
+        return set([text[i:i + 2] for i in range(len(text) - 1)])
+
+    def add(self, atom):
+        """Add ``atom`` to the index
+
+        :param atom: lowercase atom, not added before
+        :type atom: ``unicode``
+
+        """
+
+        for gram in self.bigrams(atom):
+            self.grams.setdefault(gram, []).append(atom)
+
+    def search(self, word, max_distance):
+        """Find atoms within ``max_distance`` typos of ``word``
+
+        :param word: lowercase word
+        :type word: ``unicode``
+        :param max_distance: maximum number of typos
+        :type max_distance: ``int``
+        :returns: ``dict`` of atom to its distance from ``word``
+        :rtype: ``dict``
+
+        """
+
+        grams = self.bigrams(word)
+        shared = {}
+        for gram in grams:
+            for atom in self.grams.get(gram, ()):
+                shared[atom] = shared.get(atom, 0) + 1
+
+        least = len(grams) - 3 * max_distance
+        found = {}
+        for atom, count in shared.items():
+            if count < least or abs(len(atom) - len(word)) > max_distance:
+                continue
+            distance = edit_distance(word, atom)
+            if distance <= max_distance:
+                found[atom] = distance
+        return found
+
 
 class Settings(dict):
     """A dictionary that saves itself when changed.
@@ -803,6 +1544,10 @@ class Settings(dict):
     An appropriate instance is provided by :class:`Workflow` instances at
     :attr:`Workflow.settings`.
 
+    The file is replaced atomically (written to a temporary file, then
+    renamed), so other processes never read a half-written file. Use
+    :meth:`batch` to coalesce several changes into a single write.
+
     """
 
     def __init__(self, filepath, defaults=None):
@@ -810,37 +1555,106 @@ class Settings(dict):
         super(Settings, self).__init__()
         self._filepath = filepath
         self._nosave = False
+        self._batch_depth = 0
+        self._batch_snapshot = None
+        self._dirty = False
+        self._stamp = None
         if os.path.exists(self._filepath):
             self._load()
         elif defaults:
-            for key, val in defaults.items():
-                self[key] = val
-            self.save()  # save default settings
+            with self.batch():  # save default settings
+                for key, val in defaults.items():
+                    self[key] = val
 
     def _load(self):
         """Load cached settings from JSON file `self._filepath`"""
 
         self._nosave = True
         with open(self._filepath, 'rb') as file_obj:
+            self._stamp = file_stamp(os.fstat(file_obj.fileno()))
             for key, value in json.load(file_obj, encoding='utf-8').items():
                 self[key] = value
         self._nosave = False
 
+    def reload_if_changed(self):
+        """Re-read settings if another process has replaced the file.
+
+        Reads are otherwise served from memory. Does nothing while a
+        :meth:`batch` is in progress.
+
+        :returns: ``True`` if settings were reloaded, else ``False``
+
+        """
+
+        if self._batch_depth:
+            return False
+        try:
+            stamp = file_stamp(os.stat(self._filepath))
+        except OSError:  # deleted, e.g. by `workflow:delsettings`
+            return False
+        if stamp == self._stamp:
+            return False
+        self.clear()
+        self._load()
+        return True
+
+    @contextmanager
+    def batch(self):
+        """Context manager that coalesces changes into a single write.
+
+        Settings are saved once when the outermost ``batch`` exits. If
+        an exception is raised inside it, changes are rolled back and
+        nothing is written::
+
+            with wf.settings.batch():
+                wf.settings['username'] = 'bob'
+                wf.settings['hostname'] = 'https://ci.example.com'
+
+        """
+
+        if not self._batch_depth:
+            self._batch_snapshot = dict(self)
+            self._dirty = False
+        self._batch_depth += 1
+        try:
+            yield self
+        except Exception:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.clear()
+                super(Settings, self).update(self._batch_snapshot)
+                self._batch_snapshot = None
+                self._dirty = False
+            raise
+        else:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._batch_snapshot = None
+                if self._dirty:
+                    self._dirty = False
+                    self.save()
+
     def save(self):
         """Save settings to JSON file specified in ``self._filepath``
 
         If you're using this class via :attr:`Workflow.settings`, which
         you probably are, ``self._filepath`` will be ``settings.json``
         in your workflow's data directory (see :attr:`~Workflow.datadir`).
+
+        Inside a :meth:`batch`, saving is deferred until the batch exits.
         """
         if self._nosave:
             return
+        if self._batch_depth:
+            self._dirty = True
+            return
         data = {}
         for key, value in self.items():
             data[key] = value
-        with open(self._filepath, 'wb') as file_obj:
+        with atomic_writer(self._filepath) as file_obj:
             json.dump(data, file_obj, sort_keys=True, indent=2,
                       encoding='utf-8')
+        self._stamp = file_stamp(os.stat(self._filepath))
 
     # dict methods
     def __setitem__(self, key, value):
@@ -918,6 +1732,11 @@ class Workflow(object):
         self._bundleid = None
         self._name = None
         self._cache_serializer = 'cpickle'
+        #: Compression mode per cache name: ``True``, ``False`` or
+        #: ``'auto'``. Names not listed here use ``'auto'``.
+        self.cache_compression = {}
+        # Cache path -> (file stamp, data) of data loaded by this process
+        self._cache_memo = {}
         self._data_serializer = 'cpickle'
         # info.plist should be in the directory above this one
         self._info_plist = self.workflowfile('info.plist')
@@ -925,6 +1744,14 @@ class Workflow(object):
         self._info_loaded = False
         self._logger = None
         self._items = []
+        self._feedback_format = None
+        #: Seconds (0.1 to 5.0) after which Alfred 3+ should re-run the
+        #: script filter with the same query, e.g. while data are still
+        #: being fetched. ``0`` to not re-run.
+        self.rerun = 0
+        #: Workflow variables Alfred 3+ sets for every item
+        self.variables = {}
+        self._tracer = None
         self._alfred_env = None
         # Version number of the workflow
         self._version = UNSET
@@ -1300,6 +2127,55 @@ class Workflow(object):
 
         return self.cachefile('%s.log' % self.bundleid)
 
+    @property
+    def tracer(self):
+        """:class:`Tracer` for this run.
+
+        Enabled by the ``workflow:trace`` (log spans) and
+        ``workflow:tracechrome`` (also write :attr:`trace_path`) magic
+        arguments, disabled by ``workflow:notrace``.
+
+        :rtype: :class:`Tracer`
+
+        """
+
+        if self._tracer is None:
+            mode = self.settings.get('__workflow_trace')
+            self._tracer = Tracer(
+                self.logger, enabled=bool(mode),
+                chrome_path=mode == 'chrome' and self.trace_path or None)
+        return self._tracer
+
+    @property
+    def trace_path(self):
+        """Path of Chrome trace-event file in the workflow's cache directory
+
+        :returns: ``<cachedir>/trace.json``
+        :rtype: ``unicode``
+
+        """
+
+        return self.cachefile('trace.json')
+
+    def span(self, name, **args):
+        """Time the ``with`` block as a (nested) span of :attr:`tracer`.
+
+        A no-op unless tracing has been turned on.
+
+        Example::
+
+            with wf.span('fetch', url=url):
+                data = web.get(url).json()
+
+        :param name: name of the span
+        :type name: ``unicode``
+        :param **args: extra data to log with the span
+        :returns: context manager
+
+        """
+
+        return self.tracer.span(name, **args)
+
     @property
     def logger(self):
         """Create and return a logger that logs to both console and
@@ -1382,11 +2258,17 @@ class Workflow(object):
 
         """
 
-        if not self._settings:
+        if self._settings is None:
             self.logger.debug('Reading settings from `{0}` ...'.format(
                               self.settings_path))
+            start = time.time()
             self._settings = Settings(self.settings_path,
                                       self._default_settings)
+            # Whether to trace is itself a setting, so record afterwards
+            self.tracer.record('settings', start, time.time())
+        elif self._settings.reload_if_changed():
+            self.logger.debug('Settings changed on disk, reloaded `{0}`'.format(
+                              self.settings_path))
         return self._settings
 
     @property
@@ -1575,55 +2457,157 @@ class Workflow(object):
             return
 
         # Save file extension
-        with open(metadata_path, 'wb') as file_obj:
+        with atomic_writer(metadata_path) as file_obj:
             file_obj.write(serializer_name)
 
-        with open(data_path, 'wb') as file_obj:
+        with atomic_writer(data_path) as file_obj:
             serializer.dump(data, file_obj)
 
         self.logger.debug('Stored data saved at : {0}'.format(data_path))
 
-    def cached_data(self, name, data_func=None, max_age=60):
+    def cached_data(self, name, data_func=None, max_age=60, timeout=None,
+                    placeholder=None):
         """Retrieve data from cache or re-generate and re-cache data if
         stale/non-existant. If ``max_age`` is 0, return cached data no
         matter how old.
 
+        Regeneration is single-flight: it is guarded by a
+        :class:`LockFile`, so only one process calls ``data_func`` at a
+        time. If another process is already regenerating stale data, the
+        stale copy is returned instead. If there is no copy at all, this
+        call waits up to ``timeout`` seconds for the other process and
+        returns its result, or ``placeholder`` if it hasn't finished.
+
+        Within one process, repeated loads of an unchanged cache file
+        return the same (memoized) object, so treat it as read-only and
+        save changes with :meth:`cache_data()`.
+
         :param name: name of datastore
         :param data_func: function to (re-)generate data.
         :type data_func: ``callable``
         :param max_age: maximum age of cached data in seconds
         :type max_age: ``int``
-        :returns: cached data, return value of ``data_func`` or ``None``
-            if ``data_func`` is not set
+        :param timeout: how long to wait for another process that is
+            generating the data. ``None`` waits as long as it takes,
+            ``0`` returns ``placeholder`` immediately.
+        :type timeout: ``float``
+        :param placeholder: returned if ``timeout`` expires
+        :returns: cached data, return value of ``data_func``,
+            ``placeholder`` or ``None`` if ``data_func`` is not set
 
         """
 
-        serializer = manager.serializer(self.cache_serializer)
+        cache_path = self.cachefile('%s.%s' % (name, self.cache_serializer))
+
+        if self._cache_fresh(name, max_age):
+            return self._load_cache(cache_path)
 
+        if not data_func:
+            return None
+
+        lock = LockFile(cache_path)
+        if not lock.acquire(blocking=False):
+            if os.path.exists(cache_path):
+                self.logger.debug('`%s` is being regenerated by another '
+                                  'process. Using stale data.', name)
+                return self._load_cache(cache_path)
+            self.logger.debug('Waiting for another process to generate `%s`',
+                              name)
+            if not lock.acquire(timeout=timeout):
+                self.logger.debug('Timed out waiting for `%s`', name)
+                return placeholder
+
+        try:
+            # Another process may have finished while we were waiting
+            if self._cache_fresh(name, max_age):
+                return self._load_cache(cache_path)
+
+            data = data_func()
+            self.cache_data(name, data)
+        finally:
+            lock.release()
+
+        return data
+
+    def _cache_fresh(self, name, max_age):
+        """Is there cached data for ``name`` usable under ``max_age``?"""
         cache_path = self.cachefile('%s.%s' % (name, self.cache_serializer))
         age = self.cached_data_age(name)
+        return (age < max_age or max_age == 0) and os.path.exists(cache_path)
 
-        if (age < max_age or max_age == 0) and os.path.exists(cache_path):
+    def _load_cache(self, cache_path):
+        """Deserialize and return cached data at ``cache_path``,
+        decompressing it if it was written compressed.
 
-            with open(cache_path, 'rb') as file_obj:
-                self.logger.debug('Loading cached data from : %s',
-                                  cache_path)
-                return serializer.load(file_obj)
+        Loaded data are memoized for the life of the process until the
+        file changes, so the same object is returned by repeated loads
+        and must not be modified in place.
 
-        if not data_func:
-            return None
+        """
 
-        data = data_func()
-        self.cache_data(name, data)
+        try:
+            stamp = file_stamp(os.stat(cache_path))
+        except OSError:
+            stamp = None
+        memo = self._cache_memo.get(cache_path)
+        if memo and memo[0] == stamp:
+            self.logger.debug('Using memoized cache data : %s', cache_path)
+            return memo[1]
+
+        serializer = manager.serializer(self.cache_serializer)
+        span = self.span('cache_load', file=os.path.basename(cache_path))
+        with span, open(cache_path, 'rb') as file_obj:
+            self.logger.debug('Loading cached data from : %s', cache_path)
+            stat = os.fstat(file_obj.fileno())
+            if time.time() - stat.st_atime > CACHE_ACCESS_RESOLUTION:
+                self._touch_cache(cache_path, stat)
+                # `utime` may round mtime, so stamp the file afterwards
+                stat = os.fstat(file_obj.fileno())
+            if file_obj.read(len(COMPRESSED_CACHE_MAGIC)) == \
+                    COMPRESSED_CACHE_MAGIC:
+                # Serializers such as cPickle call `read()` once per
+                # opcode on Python file-likes, so hand them the
+                # decompressed data in a (fast) cStringIO
+                data = serializer.load(StringIO(ZlibReader(file_obj).read()))
+            else:
+                file_obj.seek(0)
+                data = serializer.load(file_obj)
 
+        # Stamp of the file actually read, which may have been replaced
+        # since the `stat` above
+        self._cache_memo[cache_path] = (file_stamp(stat), data)
         return data
 
+    def _touch_cache(self, cache_path, stat):
+        """Record an access to the open cache file ``stat`` was taken of
+        for LRU eviction: volumes are often mounted ``noatime``. mtime is
+        kept, it is the age of the data.
+
+        Python 2 can only set times by path, so nothing is done if another
+        file has been renamed to ``cache_path`` since it was opened, or if
+        it has gone or can't be written.
+
+        """
+
+        try:
+            current = os.stat(cache_path)
+            if (current.st_ino, current.st_dev) == (stat.st_ino, stat.st_dev):
+                os.utime(cache_path, (time.time(), stat.st_mtime))
+        except OSError:
+            pass
+
     def cache_data(self, name, data):
         """Save ``data`` to cache under ``name``.
 
         If ``data`` is ``None``, the corresponding cache file will be
         deleted.
 
+        The cache file is zlib-compressed according to
+        ``cache_compression[name]``: always (``True``), never
+        (``False``) or, by default (``'auto'``), if the serialized data
+        are at least :const:`COMPRESS_CACHE_THRESHOLD` bytes. Compressed
+        caches are decompressed transparently by :meth:`cached_data()`.
+
         :param name: name of datastore
         :param data: data to store. This may be any object supported by
                 the cache serializer
@@ -1633,6 +2617,7 @@ class Workflow(object):
         serializer = manager.serializer(self.cache_serializer)
 
         cache_path = self.cachefile('%s.%s' % (name, self.cache_serializer))
+        self._cache_memo.pop(cache_path, None)
 
         if data is None:
             if os.path.exists(cache_path):
@@ -1640,8 +2625,20 @@ class Workflow(object):
                 self.logger.debug('Deleted cache file : %s', cache_path)
             return
 
-        with open(cache_path, 'wb') as file_obj:
-            serializer.dump(data, file_obj)
+        compress = self.cache_compression.get(name, 'auto')
+
+        with atomic_writer(cache_path) as file_obj:
+            if not compress:
+                serializer.dump(data, file_obj)
+            else:
+                buf = StringIO()
+                serializer.dump(data, buf)
+                payload = buf.getvalue()
+                if compress is True or \
+                        len(payload) >= COMPRESS_CACHE_THRESHOLD:
+                    file_obj.write(COMPRESSED_CACHE_MAGIC)
+                    payload = zlib.compress(payload, COMPRESS_CACHE_LEVEL)
+                file_obj.write(payload)
 
         self.logger.debug('Cached data saved at : %s', cache_path)
 
@@ -1683,7 +2680,8 @@ class Workflow(object):
 
     def filter(self, query, items, key=lambda x: x, ascending=False,
                include_score=False, min_score=0, max_results=0,
-               match_on=MATCH_ALL, fold_diacritics=True):
+               match_on=MATCH_ALL, fold_diacritics=True, typo_index=None,
+               boost=None):
         """Fuzzy search filter. Returns list of ``items`` that match ``query``.
 
         ``query`` is case-insensitive. Any item that does not contain the
@@ -1719,6 +2717,12 @@ class Workflow(object):
         :param fold_diacritics: Convert search keys to ASCII-only
             characters if ``query`` only contains ASCII characters.
         :type fold_diacritics: ``Boolean``
+        :param typo_index: index of the atoms of ``items`` for
+            :const:`MATCH_TYPO`. Built on the fly if not given.
+        :type typo_index: :class:`TypoIndex`
+        :param boost: score to add to items by their search key if they
+            match, e.g. to rank frequently used items first
+        :type boost: ``dict``
         :returns: list of ``items`` matching ``query`` or list of
             ``(item, score, rule)`` `tuples` if ``include_score`` is ``True``.
             ``rule`` is the ``MATCH_*`` rule that matched the item.
@@ -1749,6 +2753,11 @@ class Workflow(object):
             ``query`` appear in item search key in the same order
             (case-insensitive).
         9. :const:`MATCH_ALL` : Combination of all the above.
+        10. :const:`MATCH_TYPO` : Items not matched by the above rules
+            match if each word of ``query`` either matches by the above
+            rules or is a misspelling of an atom (see
+            :const:`TYPO_LENGTHS`). These items are ranked after all
+            others, whatever their score.
 
 
         :const:`MATCH_ALLCHARS` is considerably slower than the other
@@ -1765,6 +2774,10 @@ class Workflow(object):
         To match only on startswith and substring, use
         ``match_on=MATCH_STARTSWITH | MATCH_SUBSTRING``.
 
+        To also find misspelled items, use ``match_on=MATCH_ALL |
+        MATCH_TYPO``. For long lists, build a :class:`TypoIndex` with
+        :meth:`typo_index` once, cache it and pass it as ``typo_index``.
+
         **Diacritic folding**
 
         .. versionadded:: 1.3
@@ -1794,38 +2807,51 @@ class Workflow(object):
         fold_diacritics = self.settings.get('__workflow_diacritic_folding',
                                             fold_diacritics)
 
-        results = []
-
-        for item in items:
-            skip = False
-            score = 0
+        with self.span('filter', query=query) as span:
+            results = []
             words = [s.strip() for s in query.split(' ')]
-            value = key(item).strip()
-            if value == '':
-                continue
-            for word in words:
-                if word == '':
-                    continue
-                s, rule = self._filter_item(value, word, match_on,
-                                            fold_diacritics)
-
-                if not s:  # Skip items that don't match part of the query
-                    skip = True
-                score += s
-
-            if skip:
-                continue
-
-            if score:
-                # use "reversed" `score` (i.e. highest becomes lowest) and
-                # `value` as sort key. This means items with the same score
-                # will be sorted in alphabetical not reverse alphabetical order
-                results.append(((100.0 / score, value.lower(), score),
-                                (item, score, rule)))
-
-        # sort on keys, then discard the keys
-        results.sort(reverse=ascending)
-        results = [t[1] for t in results]
+            words = [word for word in words if word]
+
+            if not isinstance(items, (list, tuple)):
+                items = list(items)
+            values = [key(item).strip() for item in items]
+
+            matches = None
+            views = {}
+            if len(values) >= BULK_FILTER_MIN:
+                matches = self._bulk_filter(values, words, match_on,
+                                            fold_diacritics, views)
+            if matches is None:
+                matches = self._filter_values(values, words, match_on,
+                                              fold_diacritics)
+
+            matches = [(0, i, score, rule) for i, score, rule in matches]
+            if match_on & MATCH_TYPO:
+                if typo_index is None:
+                    typo_index = self.typo_index(values)
+                matched = set([m[1] for m in matches])
+                matches.extend([
+                    (1, i, score, rule) for i, score, rule in
+                    self._typo_filter(values, words, match_on,
+                                      fold_diacritics, typo_index, views,
+                                      matched)])
+
+            if boost:
+                matches = [(typo, i, score + boost.get(values[i], 0), rule)
+                           for typo, i, score, rule in matches]
+
+            for typo, i, score, rule in matches:
+                # use "reversed" `score` (i.e. highest becomes lowest)
+                # and `value` as sort key. This means items with the
+                # same score will be sorted in alphabetical not reverse
+                # alphabetical order. Typo matches come last.
+                results.append(((typo, 100.0 / score, values[i].lower(),
+                                 score), (items[i], score, rule)))
+
+            # sort on keys, then discard the keys
+            results.sort(reverse=ascending)
+            results = [t[1] for t in results]
+            span.args['matches'] = len(results)
 
         if min_score:
             results = [r for r in results if r[1] > min_score]
@@ -1839,6 +2865,348 @@ class Workflow(object):
         # just return list of items
         return [t[0] for t in results]
 
+    def _filter_values(self, values, words, match_on, fold_diacritics):
+        """Match ``values`` against all ``words`` one by one
+
+        :returns: list of ``(index, score, rule)`` of matching values,
+            ``rule`` being the rule that matched the last word
+
+        """
+
+        matches = []
+        for i, value in enumerate(values):
+            if value == '':
+                continue
+            score = 0
+            for word in words:
+                s, rule = self._filter_item(value, word, match_on,
+                                            fold_diacritics)
+                # Skip items that don't match part of the query
+                if not s:
+                    break
+                score += s
+            else:
+                if score:
+                    matches.append((i, score, rule))
+        return matches
+
+    def _bulk_filter(self, values, words, match_on, fold_diacritics,
+                     views):
+        """Match ``values`` against all ``words`` in bulk
+
+        Returns the same as :meth:`_filter_values`. Instead of running
+        every test of :meth:`_filter_item` on one value after the other,
+        each test runs over all values still in question at once (see
+        :meth:`_bulk_match`), so the values a word rules out are never
+        looked at again.
+
+        :param views: ``dict`` for :meth:`_filter_view` to keep its
+            results in
+        :returns: list of ``(index, score, rule)``, or ``None`` if
+            ``values`` or ``words`` contain newlines
+
+        """
+
+        packed = '\n'.join(values)
+        if packed.count('\n') != len(values) - 1 or \
+                any('\n' in word for word in words):
+            return None
+
+        indices = range(len(values))
+        scores = dict.fromkeys(indices, 0)
+        rules = {}
+        for word in words:
+            query = word.lower()
+            fold = fold_diacritics and isascii(query)
+            folded, lowered = self._filter_view(values, packed, fold, views)
+            matched = self._bulk_match(query, folded, lowered, indices,
+                                       match_on)
+            # Skip items that don't match part of the query
+            indices = [i for i in indices if matched.get(i, (0,))[0]]
+            for i in indices:
+                scores[i] += matched[i][0]
+                rules[i] = matched[i][1]
+
+        return [(i, scores[i], rules[i]) for i in indices if scores[i]]
+
+    def _bulk_match(self, query, folded, lowered, indices, match_on):
+        """Match ``query`` against the values at ``indices`` like
+        :meth:`_filter_item`, one rule at a time
+
+        The pre-filter and the prefix and substring tests are batched
+        string tests, the other rules regular expressions over all
+        values not matched by an earlier rule, joined by newlines (see
+        :meth:`_bulk_patterns`).
+
+        :param query: lowercase word to match
+        :param folded: values, folded to ASCII if appropriate
+        :param lowered: ``folded`` in lowercase
+        :param indices: ascending indices of the values to match
+        :returns: ``dict`` of index to ``(score, rule)``
+
+        """
+
+        # pre-filter any items that do not contain all characters
+        # of ``query``
+        for c in set(query):
+            indices = [i for i in indices if c in lowered[i]]
+
+        matched = {}
+        for rule, pattern in self._bulk_patterns(query, match_on):
+            if not indices:
+                break
+            if rule == MATCH_STARTSWITH:
+                found = dict.fromkeys(
+                    [i for i in indices if lowered[i].startswith(query)], 0)
+            elif rule == MATCH_SUBSTRING:
+                found = dict.fromkeys(
+                    [i for i in indices if query in lowered[i]], 0)
+            else:
+                text = '\n' + '\n'.join([folded[i] for i in indices])
+                found = dict((indices[line], end) for line, end in
+                             self._match_lines(pattern, text).items())
+
+            for i, end in found.items():
+                matched[i] = (self._rule_score(rule, folded[i], query, end),
+                              rule)
+            indices = [i for i in indices if i not in found]
+
+        return matched
+
+    def _bulk_patterns(self, query, match_on):
+        """The rules of :meth:`_filter_item` as regular expressions, for
+        :meth:`_bulk_match`
+
+        Each pattern matches a newline followed by a value that ``query``
+        (lowercase) matches by that rule. :const:`MATCH_ALLCHARS` only
+        matches up to the end of its :meth:`_search_for_query` match.
+
+        :returns: list of ``(rule, pattern)`` in the order
+            :meth:`_filter_item` tests the rules. ``pattern`` is ``None``
+            for :const:`MATCH_STARTSWITH` and :const:`MATCH_SUBSTRING`,
+            which are plain string tests.
+
+        """
+
+        patterns = []
+        # Capitals, atoms and initials only contain letters and digits
+        alnum = all([c in INITIALS_LOWER for c in query])
+        initials = '[a-zA-Z0-9]*[^a-zA-Z0-9\n]+'.join(query)
+        atom_start = '\n(?:[^\n]*?[^a-zA-Z0-9\n])?'
+
+        if match_on & MATCH_STARTSWITH:
+            patterns.append((MATCH_STARTSWITH, None, 0))
+        if match_on & MATCH_CAPITALS and alnum:
+            patterns.append((MATCH_CAPITALS, '\n[^A-Z0-9\n]*' +
+                             '[^A-Z0-9\n]*'.join(query.upper()), 0))
+        if match_on & MATCH_ATOM and alnum:
+            patterns.append((MATCH_ATOM,
+                             atom_start + query + '(?![a-zA-Z0-9])',
+                             re.IGNORECASE))
+        if match_on & MATCH_INITIALS_STARTSWITH and alnum:
+            patterns.append((MATCH_INITIALS_STARTSWITH,
+                             '\n[^a-zA-Z0-9\n]*' + initials, re.IGNORECASE))
+        if match_on & MATCH_INITIALS_CONTAIN and alnum:
+            patterns.append((MATCH_INITIALS_CONTAIN, atom_start + initials,
+                             re.IGNORECASE))
+        if match_on & MATCH_SUBSTRING:
+            patterns.append((MATCH_SUBSTRING, None, 0))
+        if match_on & MATCH_ALLCHARS:
+            # Same match as `_search_for_query`, without backtracking
+            pattern = ''.join(['[^{0}\n]*{0}'.format(re.escape(c))
+                               for c in query])
+            patterns.append((MATCH_ALLCHARS, '\n' + pattern, re.IGNORECASE))
+
+        return [(rule, pattern and re.compile(pattern, flags))
+                for rule, pattern, flags in patterns]
+
+    def _match_lines(self, pattern, text):
+        """Find the lines of ``text`` that ``pattern`` matches
+
+        :param pattern: compiled pattern. If it starts with a newline,
+            so must ``text``, and a match is counted for the line after
+            that newline.
+        :param text: newline-separated lines
+        :returns: ``dict`` of line number (from 0) to the length of the
+            (first) match in that line, less the newline
+
+        """
+
+        lines = {}
+        line = pos = 0
+        for match in pattern.finditer(text):
+            start = match.start()
+            line += text.count('\n', pos, start)
+            pos = start
+            if line not in lines:
+                lines[line] = match.end() - start - 1
+        return lines
+
+    def _filter_view(self, values, packed, fold, views):
+        """Values as :meth:`_filter_item` sees them
+
+        :param packed: ``values`` joined by newlines
+        :param fold: whether to fold values to ASCII
+        :param views: ``dict`` of earlier results, by ``fold``
+        :returns: ``tuple`` of list of values, folded if ``fold`` is
+            ``True``, and list of the same in lowercase
+
+        """
+
+        if fold not in views:
+            folded = self._fold_values(values, packed) if fold else values
+            views[fold] = (folded, [v.lower() for v in folded])
+        return views[fold]
+
+    def _fold_values(self, values, packed):
+        """Fold ``values`` to ASCII
+
+        :param packed: ``values`` joined by newlines
+        :returns: ``list`` of folded values
+
+        """
+
+        if isascii(packed):
+            return values
+        folded = list(values)
+        for i in self._match_lines(NON_ASCII, packed):
+            folded[i] = self.fold_to_ascii(values[i])
+        return folded
+
+    def typo_index(self, items, key=lambda x: x):
+        """Build a :class:`TypoIndex` of the atoms of ``items``
+
+        Atoms are the lowercase, ASCII-folded "words" of the search keys
+        (see :const:`MATCH_ATOM`) that are long enough to be misspelt.
+
+        :param items: items to index
+        :type items: ``list`` or ``tuple``
+        :param key: function to get the search key of an item, as for
+            :meth:`filter`
+        :type key: ``callable``
+        :returns: index for :meth:`filter`
+        :rtype: :class:`TypoIndex`
+
+        """
+
+        values = [key(item).strip() for item in items]
+        packed = '\n'.join(values)
+        if packed.count('\n') != len(values) - 1:
+            packed = self.fold_to_ascii(packed)
+        else:
+            packed = '\n'.join(self._fold_values(values, packed))
+
+        index = TypoIndex()
+        for atom in sorted(set(split_on_delimiters(packed.lower()))):
+            # Shorter atoms are more than one typo away from any word.
+            # A "typo" in a number (build, version...) is another number.
+            if len(atom) >= TYPO_LENGTHS[0] - 1 and not atom.isdigit():
+                index.add(atom)
+        return index
+
+    def _typo_filter(self, values, words, match_on, fold_diacritics,
+                     typo_index, views, matched):
+        """Match ``values`` against all ``words``, allowing typos
+
+        Each word must match by one of the ``match_on`` rules or be a
+        misspelling of an atom of the value. Words that don't contain
+        only ASCII letters and digits must match exactly.
+
+        :param views: ``dict`` for :meth:`_filter_view` to keep its
+            results in
+        :param matched: ``set`` of indices of values to skip, because
+            they match without typos
+        :returns: list of ``(index, score, rule)`` of the values with an
+            atom ``typo_index`` finds for a word, ``rule`` being the rule
+            that matched the last word
+
+        """
+
+        typos = []
+        for word in words:
+            query = word.lower()
+            max_distance = len([n for n in TYPO_LENGTHS if len(query) >= n])
+            if (max_distance and not query.isdigit() and
+                    all([c in INITIALS_LOWER for c in query])):
+                typos.append(typo_index.search(query, max_distance))
+            else:
+                typos.append({})
+        atoms = set()
+        for found in typos:
+            atoms.update(found)
+        if not atoms:
+            return []
+
+        packed = '\n'.join(values)
+        if packed.count('\n') != len(values) - 1 or \
+                any('\n' in word for word in words):
+            # Match one by one
+            candidates = []
+            for i, value in enumerate(values):
+                if i in matched:
+                    continue
+                atoms = split_on_delimiters(self.fold_to_ascii(value).lower())
+                scores = [self._filter_item(value, word, match_on,
+                                            fold_diacritics)
+                          for word in words]
+                candidates.append((i, atoms, scores))
+        else:
+            # Values containing one of the atoms, matched in bulk
+            folded, lowered = self._filter_view(values, packed, True, views)
+            pattern = re.compile('(?<![a-z0-9])(?:{0})(?![a-z0-9])'.format(
+                '|'.join(sorted(atoms, key=len, reverse=True))))
+            indices = [i for i in
+                       sorted(self._match_lines(pattern, '\n'.join(lowered)))
+                       if i not in matched]
+            matched = []
+            for word in words:
+                query = word.lower()
+                fold = fold_diacritics and isascii(query)
+                view = self._filter_view(values, packed, fold, views)
+                matched.append(self._bulk_match(query, view[0], view[1],
+                                                indices, match_on))
+            candidates = [(i, split_on_delimiters(lowered[i]),
+                           [m.get(i, (0, None)) for m in matched])
+                          for i in indices]
+
+        matches = []
+        for i, value_atoms, scores in candidates:
+            score = 0
+            for (s, rule), found in zip(scores, typos):
+                if not s:
+                    distances = [found[a] for a in value_atoms if a in found]
+                    if not distances:
+                        break
+                    s = TYPO_SCORE - 10 * max(min(distances) - 1, 0)
+                    rule = MATCH_TYPO
+                score += s
+            else:
+                matches.append((i, score, rule))
+        return matches
+
+    def _rule_score(self, rule, value, query, end):
+        """Score of ``value`` matching ``query`` by ``rule``, as
+        :meth:`_filter_item` calculates it
+
+        :param end: end of the :const:`MATCH_ALLCHARS` match
+
+        """
+
+        if rule in (MATCH_STARTSWITH, MATCH_ATOM):
+            return 100.0 - (len(value) / len(query))
+        if rule == MATCH_CAPITALS:
+            initials = ''.join([c for c in value if c in INITIALS])
+            return 100.0 - (len(initials) / len(query))
+        if rule & MATCH_INITIALS:
+            initials = len([s for s in split_on_delimiters(value) if s])
+            if rule == MATCH_INITIALS_STARTSWITH:
+                return 100.0 - (initials / len(query))
+            return 95.0 - (initials / len(query))
+        if rule == MATCH_SUBSTRING:
+            return 90.0 - (len(value) / len(query))
+        # MATCH_ALLCHARS, which always matches from the start
+        return 100.0 / (end + 1)
+
     def _filter_item(self, value, query, match_on, fold_diacritics):
         """Filter ``value`` against ``query`` using rules ``match_on``
 
@@ -1976,11 +3344,12 @@ class Workflow(object):
             # initialise `self.settings`, which will raise an exception
             # if `settings.json` isn't valid.
 
-            if self._update_settings:
-                self.check_update()
+            with self.span('run'):
+                if self._update_settings:
+                    self.check_update()
 
-            # Run workflow's entry function/method
-            func(self)
+                # Run workflow's entry function/method
+                func(self)
 
             # Set last version run to current version after a successful
             # run
@@ -2006,13 +3375,16 @@ class Workflow(object):
         finally:
             self.logger.debug('Workflow finished in {0:0.3f} seconds.'.format(
                               time.time() - start))
+            if self._tracer:
+                self._tracer.flush()
         return 0
 
     # Alfred feedback methods ------------------------------------------
 
     def add_item(self, title, subtitle='', modifier_subtitles=None, arg=None,
                  autocomplete=None, valid=False, uid=None, icon=None,
-                 icontype=None, type=None, largetext=None, copytext=None):
+                 icontype=None, type=None, largetext=None, copytext=None,
+                 variables=None):
         """Add an item to be output to Alfred
 
         :param title: Title shown in Alfred
@@ -2052,6 +3424,10 @@ class Workflow(object):
         :param copytext: Text to be copied to pasteboard if user presses
             CMD+C on item.
         :type copytext: ``unicode``
+        :param variables: Workflow variables Alfred sets for the next
+            action when the item is actioned. Only sent in the JSON
+            :attr:`feedback_format`; Alfred 2 ignores them.
+        :type variables: ``dict``
         :returns: :class:`Item` instance
 
         See the :ref:`script-filter-results` section of the documentation
@@ -2074,17 +3450,102 @@ class Workflow(object):
 
         item = self.item_class(title, subtitle, modifier_subtitles, arg,
                                autocomplete, valid, uid, icon, icontype, type,
-                               largetext, copytext)
+                               largetext, copytext, variables)
         self._items.append(item)
         return item
 
+    def add_items(self, items):
+        """Add several items to the list of results sent to Alfred.
+
+        Cheaper than calling :meth:`add_item` in a loop for long lists.
+
+        :param items: iterable of ``dict``\ s of :meth:`add_item`
+            keyword arguments
+        :returns: the generated :class:`Item` objects
+        :rtype: ``list``
+
+        """
+
+        item_class = self.item_class
+        new_items = [item_class(**kwargs) for kwargs in items]
+        self._items.extend(new_items)
+        return new_items
+
+    @property
+    def feedback_format(self):
+        """Format :meth:`send_feedback()` writes: ``'xml'`` or ``'json'``.
+
+        Unless set explicitly, ``'json'`` when running under Alfred 3 or
+        later (which understand it) and ``'xml'`` otherwise.
+
+        :returns: ``'xml'`` or ``'json'``
+        :rtype: ``unicode``
+
+        """
+
+        if self._feedback_format:
+            return self._feedback_format
+        version = self.alfred_env.get('version') or ''
+        try:
+            major = int(version.split('.')[0])
+        except ValueError:
+            major = 0
+        return major >= 3 and 'json' or 'xml'
+
+    @feedback_format.setter
+    def feedback_format(self, value):
+        """Force :meth:`send_feedback()` output format.
+
+        :param value: ``'xml'``, ``'json'`` or ``None`` to choose
+            automatically
+        :type value: ``unicode``
+
+        """
+
+        if value not in (None, 'xml', 'json'):
+            raise ValueError('Unknown feedback format : `{0}`'.format(value))
+        self._feedback_format = value
+
     def send_feedback(self):
-        """Print stored items to console/Alfred as XML."""
-        root = ET.Element('items')
+        """Print stored items to console/Alfred as XML or JSON, see
+        :attr:`feedback_format`.
+
+        XML items are serialized straight to text with :attr:`Item.xml`
+        rather than via an :class:`~xml.etree.ElementTree.ElementTree`.
+        Subclasses of :class:`Item` that override :attr:`~Item.elem`
+        are still serialized from their element.
+
+        :attr:`rerun` and :attr:`variables` are only sent as JSON.
+
+        """
+
+        with self.span('feedback', items=len(self._items)):
+            self._send_feedback()
+
+    def _send_feedback(self):
+        """Write feedback in :attr:`feedback_format`"""
+        if self.feedback_format == 'json':
+            feedback = {'items': [item.obj for item in self._items]}
+            if self.rerun:
+                feedback['rerun'] = self.rerun
+            if self.variables:
+                feedback['variables'] = self.variables
+            json.dump(feedback, sys.stdout)
+            sys.stdout.flush()
+            return
+
+        parts = []
         for item in self._items:
-            root.append(item.elem)
+            if type(item).elem is Item.elem:
+                parts.append(item.xml)
+            else:
+                parts.append(ET.tostring(item.elem))
         sys.stdout.write('<?xml version="1.0" encoding="utf-8"?>\n')
-        sys.stdout.write(ET.tostring(root).encode('utf-8'))
+        if parts:
+            xml = '<items>%s</items>' % ''.join(parts)
+        else:
+            xml = '<items />'
+        sys.stdout.write(xml.encode('utf-8'))
         sys.stdout.flush()
 
     ####################################################################
@@ -2439,6 +3900,24 @@ class Workflow(object):
             else:
                 return 'No update available'
 
+        # Tracing
+        def trace_on():
+            self.settings['__workflow_trace'] = 'log'
+            return 'Tracing spans to the log'
+
+        def trace_chrome():
+            self.settings['__workflow_trace'] = 'chrome'
+            return 'Tracing spans to the log and {0}'.format(self.trace_path)
+
+        def trace_off():
+            if '__workflow_trace' in self.settings:
+                del self.settings['__workflow_trace']
+            return 'Tracing turned off'
+
+        self.magic_arguments['trace'] = trace_on
+        self.magic_arguments['tracechrome'] = trace_chrome
+        self.magic_arguments['notrace'] = trace_off
+
         self.magic_arguments['autoupdate'] = update_on
         self.magic_arguments['noautoupdate'] = update_off
         self.magic_arguments['update'] = do_update
@@ -2697,9 +4176,11 @@ class Workflow(object):
         """
 
         cmd = ['security', action, '-s', service, '-a', account] + list(args)
-        p = subprocess.Popen(cmd, stdout=subprocess.PIPE,
-                             stderr=subprocess.STDOUT)
-        retcode, output = p.wait(), p.stdout.read().strip().decode('utf-8')
+        with self.span('keychain', action=action, account=account):
+            p = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                 stderr=subprocess.STDOUT)
+            retcode = p.wait()
+            output = p.stdout.read().strip().decode('utf-8')
         if retcode == 44:  # password does not exist
             raise PasswordNotFound()
         elif retcode == 45:  # password already exists